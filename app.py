@@ -4,132 +4,99 @@ Upload documents and visualize concept relationships as interactive graphs
 """
 
 import streamlit as st
+import pyarrow as pa
+import pyarrow.compute as pc
+import hashlib
 import json
-import tempfile
 import os
-from typing import Dict, Any, Optional
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from jinja2 import Environment
+from markupsafe import Markup, escape
 
 # Import our custom modules
 from parsing_utils import DocumentParser, validate_file_upload
-from graph_utils import ConceptExtractor, GraphBuilder
-from pyvis.network import Network
-import networkx as nx
+from graph_utils import ConceptExtractor, GraphBuilder, prefetch_tokenizer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Check if running on Hugging Face Spaces
 IS_HUGGINGFACE = os.getenv("SPACE_ID") is not None
 
+# pyvis options, kept as dicts and assigned to Network.options directly so
+# pyvis doesn't re-parse an options string on every render
+BARNES_HUT_OPTIONS = {"gravitationalConstant": -8000, "springConstant": 0.001}
+FORCE_ATLAS_OPTIONS = {"gravitationalConstant": -50, "springLength": 100}
+PHYSICS_OFF_OPTIONS = {"enabled": False}
+INTERACTION_OPTIONS = {
+    "dragNodes": True,
+    "dragView": True,
+    "zoomView": True
+}
 
-def generate_comprehensive_html_report(doc_info, stats, ai_summary, sorted_concepts, 
-                                     relationships, relationship_types, export_data):
-    """Generate a comprehensive HTML report with embedded interactive graph"""
-    
-    # Create a new graph for the HTML report
-    report_net = Network(
-        height="600px",
-        width="100%",
-        bgcolor="#ffffff",
-        font_color="black",
-        directed=True
-    )
-    
-    # Configure the graph
-    report_net.set_options("""
-    var options = {
-      "physics": {
-        "enabled": true,
-        "stabilization": {"iterations": 100},
-        "barnesHut": {"gravitationalConstant": -8000, "springConstant": 0.001}
-      },
-      "interaction": {
-        "dragNodes": true,
-        "dragView": true,
-        "zoomView": true
-      },
-      "nodes": {
-        "font": {"size": 14}
-      },
-      "edges": {
-        "font": {"size": 12}
-      }
+# Graphs with more nodes than this use the forceAtlas2Based solver
+FORCE_ATLAS_MIN_NODES = 30
+
+
+def _physics_options(num_nodes: int) -> Dict[str, Any]:
+    """Physics settings scaled to the graph size"""
+    physics = {
+        "enabled": True,
+        "adaptiveTimestep": True,
+        # Small graphs settle well before 100 stabilization steps
+        "stabilization": {"iterations": min(100, max(20, 4 * num_nodes))}
     }
-    """)
-    
-    # Add nodes to report graph
-    for node in export_data['nodes']:
-        type_colors = {
-            'category': '#ff9999',
-            'entity': '#66b3ff',
-            'process': '#99ff99',
-            'definition': '#ffcc99',
-            'other': '#ff99cc'
-        }
-        color = type_colors.get(node['type'], '#cccccc')
-        
-        report_net.add_node(
-            node['id'],
-            label=node['label'],
-            title=f"{node['title']}\\nType: {node['type']}\\nImportance: {node['importance']}",
-            size=int(node['size'] * 1.5),
-            color=color,
-            font={'size': 14, 'color': 'black'}
-        )
-    
-    # Add edges to report graph
-    for edge in export_data['edges']:
-        report_net.add_edge(
-            edge['from'],
-            edge['to'],
-            label=edge['label'],
-            title=f"{edge['label']}: {edge['title']}",
-            width=edge['width'],
-            arrows="to"
-        )
-    
-    # Generate graph HTML
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as graph_tmp:
-        report_net.save_graph(graph_tmp.name)
-        with open(graph_tmp.name, 'r', encoding='utf-8') as f:
-            graph_html_content = f.read()
-        os.unlink(graph_tmp.name)
-    
-    # Extract just the graph div and script from the generated HTML
-    import re
-    graph_div_match = re.search(r'<div id="mynetworkid".*?</div>', graph_html_content, re.DOTALL)
-    script_match = re.search(r'<script type="text/javascript">.*?</script>', graph_html_content, re.DOTALL)
-    
-    graph_div = graph_div_match.group(0) if graph_div_match else '<div>Graph could not be generated</div>'
-    graph_script = script_match.group(0) if script_match else ''
-    
-    # Create comprehensive HTML report
-    html_report = f"""<!DOCTYPE html>
+    if num_nodes > FORCE_ATLAS_MIN_NODES:
+        physics["solver"] = "forceAtlas2Based"
+        physics["forceAtlas2Based"] = FORCE_ATLAS_OPTIONS
+    else:
+        physics["barnesHut"] = BARNES_HUT_OPTIONS
+    return physics
+
+
+def _graph_options(physics_enabled: bool, font_size: int, num_nodes: int) -> Dict[str, Any]:
+    """Build the pyvis options dict for the given physics, font and graph size"""
+    return {
+        "physics": _physics_options(num_nodes) if physics_enabled else PHYSICS_OFF_OPTIONS,
+        "interaction": INTERACTION_OPTIONS,
+        "nodes": {"font": {"size": font_size}},
+        "edges": {"font": {"size": max(8, font_size - 2)}}
+    }
+
+
+# HTML report layout, compiled once at import
+_REPORT_HTML_SOURCE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Context Graph Explorer - Analysis Report</title>
-    <script type="text/javascript" src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
+    {{ vis_head }}
     <style>
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; line-height: 1.6; }}
-        .container {{ max-width: 1200px; margin: 0 auto; background: white; border-radius: 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); overflow: hidden; }}
-        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }}
-        .header h1 {{ margin: 0; font-size: 2.5em; font-weight: 300; }}
-        .header p {{ margin: 10px 0 0 0; opacity: 0.9; font-size: 1.1em; }}
-        .content {{ padding: 30px; }}
-        .section {{ margin-bottom: 30px; }}
-        .section h2 {{ color: #333; border-bottom: 2px solid #667eea; padding-bottom: 10px; margin-bottom: 20px; }}
-        .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin: 20px 0; }}
-        .stat-card {{ background: #e8f5e8; padding: 20px; border-radius: 8px; text-align: center; }}
-        .stat-number {{ font-size: 2.5em; font-weight: bold; color: #2e7d32; }}
-        .stat-label {{ color: #666; margin-top: 5px; }}
-        .graph-container {{ border: 1px solid #ddd; border-radius: 8px; margin: 20px 0; background: white; }}
-        #mynetworkid {{ height: 600px !important; width: 100% !important; }}
-        .ai-summary {{ background: #fff3e0; padding: 20px; border-radius: 8px; border-left: 4px solid #ff9800; font-style: italic; }}
-        .concept-list {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(300px, 1fr)); gap: 15px; }}
-        .concept-item {{ background: #f8f9fa; padding: 15px; border-radius: 8px; border-left: 4px solid #28a745; }}
-        .concept-item h4 {{ margin: 0 0 10px 0; color: #333; }}
-        .concept-importance {{ background: #667eea; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; display: inline-block; }}
-        .footer {{ background: #333; color: white; text-align: center; padding: 20px; margin-top: 30px; }}
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; line-height: 1.6; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; border-radius: 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); overflow: hidden; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }
+        .header h1 { margin: 0; font-size: 2.5em; font-weight: 300; }
+        .header p { margin: 10px 0 0 0; opacity: 0.9; font-size: 1.1em; }
+        .content { padding: 30px; }
+        .section { margin-bottom: 30px; }
+        .section h2 { color: #333; border-bottom: 2px solid #667eea; padding-bottom: 10px; margin-bottom: 20px; }
+        .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin: 20px 0; }
+        .stat-card { background: #e8f5e8; padding: 20px; border-radius: 8px; text-align: center; }
+        .stat-number { font-size: 2.5em; font-weight: bold; color: #2e7d32; }
+        .stat-label { color: #666; margin-top: 5px; }
+        .graph-container { border: 1px solid #ddd; border-radius: 8px; margin: 20px 0; background: white; }
+        #mynetworkid { height: 600px !important; width: 100% !important; }
+        .ai-summary { background: #fff3e0; padding: 20px; border-radius: 8px; border-left: 4px solid #ff9800; font-style: italic; }
+        .concept-list { display: grid; grid-template-columns: repeat(auto-fill, minmax(300px, 1fr)); gap: 15px; }
+        .concept-item { background: #f8f9fa; padding: 15px; border-radius: 8px; border-left: 4px solid #28a745; }
+        .concept-item h4 { margin: 0 0 10px 0; color: #333; }
+        .concept-importance { background: #667eea; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; display: inline-block; }
+        .footer { background: #333; color: white; text-align: center; padding: 20px; margin-top: 30px; }
     </style>
 </head>
 <body>
@@ -142,24 +109,24 @@ def generate_comprehensive_html_report(doc_info, stats, ai_summary, sorted_conce
         <div class="content">
             <div class="section">
                 <h2>📄 Document Information</h2>
-                <p><strong>Filename:</strong> {doc_info.get('filename', 'Unknown')}</p>
-                <p><strong>Type:</strong> {doc_info.get('file_type', 'Unknown')}</p>
-                <p><strong>Processed:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p><strong>Filename:</strong> {{ doc_info.get('filename', 'Unknown') }}</p>
+                <p><strong>Type:</strong> {{ doc_info.get('file_type', 'Unknown') }}</p>
+                <p><strong>Processed:</strong> {{ processed_at }}</p>
             </div>
             
             <div class="section">
                 <h2>📊 Graph Statistics</h2>
                 <div class="stats-grid">
                     <div class="stat-card">
-                        <div class="stat-number">{stats.get('nodes', 0)}</div>
+                        <div class="stat-number">{{ stats.get('nodes', 0) }}</div>
                         <div class="stat-label">Concepts</div>
                     </div>
                     <div class="stat-card">
-                        <div class="stat-number">{stats.get('edges', 0)}</div>
+                        <div class="stat-number">{{ stats.get('edges', 0) }}</div>
                         <div class="stat-label">Relationships</div>
                     </div>
                     <div class="stat-card">
-                        <div class="stat-number">{stats.get('density', 0):.3f}</div>
+                        <div class="stat-number">{{ '%.3f' | format(stats.get('density', 0)) }}</div>
                         <div class="stat-label">Density</div>
                     </div>
                 </div>
@@ -169,32 +136,25 @@ def generate_comprehensive_html_report(doc_info, stats, ai_summary, sorted_conce
                 <h2>🌐 Interactive Concept Graph</h2>
                 <p><em>Drag nodes to move them, use mouse wheel to zoom, and click and drag to pan around the graph.</em></p>
                 <div class="graph-container">
-                    {graph_div}
+                    <div id="mynetworkid"></div>
                 </div>
             </div>
             
             <div class="section">
                 <h2>🤖 AI-Generated Summary</h2>
                 <div class="ai-summary">
-                    {ai_summary.replace(chr(10), '<br>')}
+                    {{ ai_summary | nl2br }}
                 </div>
             </div>
             
             <div class="section">
                 <h2>🎯 Key Concepts</h2>
-                <div class="concept-list">"""
-    
-    # Add top concepts
-    for i, concept in enumerate(sorted_concepts[:15], 1):
-        concept_type = concept.get('type', 'other')
-        html_report += f"""
+                <div class="concept-list">{% for concept in top_concepts %}
                     <div class="concept-item">
-                        <h4>{concept.get('name', 'Unknown')} <span class="concept-importance">{concept.get('importance', 0)}</span></h4>
-                        <p><strong>Type:</strong> {concept_type.title()}</p>
-                        <p>{concept.get('description', 'No description available')}</p>
-                    </div>"""
-    
-    html_report += """
+                        <h4>{{ concept.get('name', 'Unknown') }} <span class="concept-importance">{{ concept.get('importance', 0) }}</span></h4>
+                        <p><strong>Type:</strong> {{ concept.get('type', 'other').title() }}</p>
+                        <p>{{ concept.get('description', 'No description available') }}</p>
+                    </div>{% endfor %}
                 </div>
             </div>
         </div>
@@ -204,11 +164,121 @@ def generate_comprehensive_html_report(doc_info, stats, ai_summary, sorted_conce
         </div>
     </div>
     
-    """ + graph_script + """
+    <script type="text/javascript">
+        new vis.Network(
+            document.getElementById('mynetworkid'),
+            {nodes: new vis.DataSet({{ graph_nodes | tojson }}), edges: new vis.DataSet({{ graph_edges | tojson }})},
+            {{ graph_options | tojson }}
+        );
+    </script>
 </body>
 </html>"""
+
+
+def _nl2br(text: str) -> Markup:
+    """Escape text and turn its line breaks into <br> tags"""
+    return escape(text or '').replace('\n', Markup('<br>'))
+
+
+_REPORT_ENV = Environment(autoescape=True)
+_REPORT_ENV.filters['nl2br'] = _nl2br
+_REPORT_TEMPLATE = _REPORT_ENV.from_string(_REPORT_HTML_SOURCE)
+
+
+# vis-network build bundled with the app, inlined so reports open offline
+VIS_NETWORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib', 'vis-9.1.2')
+
+
+@st.cache_resource
+def _vis_head_html() -> str:
+    """The report's vis-network <head> markup, built once per process
+    
+    Inlines the bundled CSS and JS so reports work offline, or loads the
+    library from the CDN when the bundle isn't available.
+    """
+    try:
+        with open(os.path.join(VIS_NETWORK_DIR, 'vis-network.css'), encoding='utf-8') as css_file:
+            css = css_file.read()
+        with open(os.path.join(VIS_NETWORK_DIR, 'vis-network.min.js'), encoding='utf-8') as js_file:
+            js = js_file.read()
+    except OSError:
+        return '<script type="text/javascript" src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>'
+    return f'<style>{css}</style>\n    <script type="text/javascript">{js}</script>'
+
+
+def _graph_elements(export_data: Dict[str, Any], node_size_factor: float, font_size: int,
+                    show_labels: bool = True, show_node_labels: bool = True) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Build the vis.js node and edge dicts for the export data"""
+    nodes = [
+        {
+            'id': node['id'],
+            'label': node['label'] if show_node_labels else "",
+            'shape': 'dot',
+            'title': f"{node['title']}\nType: {node['type']}\nImportance: {node['importance']}",
+            'size': int(node['size'] * node_size_factor),
+            'color': node['color'],
+            'font': {'size': font_size, 'color': 'black'}
+        }
+        for node in export_data['nodes']
+    ]
+    
+    known_ids = {node['id'] for node in nodes}
+    edges = []
+    seen_edges = set()
+    for edge in export_data['edges']:
+        key = (edge['from'], edge['to'])
+        if key in seen_edges or edge['from'] not in known_ids or edge['to'] not in known_ids:
+            continue
+        seen_edges.add(key)
+        edge_options = {
+            'from': edge['from'],
+            'to': edge['to'],
+            'title': f"{edge['label']}: {edge['title']}",
+            'width': edge['width'],
+            'arrows': "to"
+        }
+        # Even an empty label makes vis.js lay out a text element per edge,
+        # so only set it when labels are shown; the title still has it on hover
+        if show_labels:
+            edge_options['label'] = edge['label']
+        edges.append(edge_options)
+    
+    return nodes, edges
+
+
+def _set_graph_elements(net, export_data: Dict[str, Any], node_size_factor: float, font_size: int,
+                        show_labels: bool = True, show_node_labels: bool = True) -> None:
+    """Assign nodes and edges to a pyvis Network in bulk
+    
+    Building the node and edge dicts directly replaces one add_node/add_edge
+    call per element; add_edge scans the node id list for every edge.
+    """
+    net.nodes, net.edges = _graph_elements(
+        export_data, node_size_factor, font_size, show_labels, show_node_labels
+    )
+    net.node_ids = [node['id'] for node in net.nodes]
+    net.node_map = {node['id']: node for node in net.nodes}
+
+
+def generate_comprehensive_html_report(doc_info, stats, ai_summary, sorted_concepts, 
+                                     relationships, relationship_types, export_data,
+                                     processed_at: Optional[str] = None, vis_head: Optional[str] = None):
+    """Generate a comprehensive HTML report with embedded interactive graph"""
+    # Build the graph data for the report's vis.js network
+    graph_nodes, graph_edges = _graph_elements(export_data, node_size_factor=1.5, font_size=14)
     
-    return html_report
+    # Render the comprehensive HTML report
+    return _REPORT_TEMPLATE.render(
+        doc_info=doc_info,
+        stats=stats,
+        processed_at=processed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        graph_nodes=graph_nodes,
+        graph_edges=graph_edges,
+        graph_options=_graph_options(True, 14, len(graph_nodes)),
+        ai_summary=ai_summary,
+        top_concepts=sorted_concepts[:15],
+        vis_head=Markup(_vis_head_html() if vis_head is None else vis_head)
+    )
 
 # Configure Streamlit page
 st.set_page_config(
@@ -225,6 +295,517 @@ if 'graph_data' not in st.session_state:
     st.session_state.graph_data = None
 if 'api_key' not in st.session_state:
     st.session_state.api_key = ""
+if 'batch_job' not in st.session_state:
+    st.session_state.batch_job = None
+if '_render_cache' not in st.session_state:
+    st.session_state._render_cache = {}
+
+
+@st.cache_resource
+def _get_parser() -> DocumentParser:
+    """Shared DocumentParser instance reused across reruns"""
+    return DocumentParser()
+
+
+@st.cache_resource
+def _get_extractor(api_key: str) -> ConceptExtractor:
+    """Shared ConceptExtractor per API key, so its OpenAI client keeps its connection pool across reruns"""
+    return ConceptExtractor(api_key)
+
+
+class _DocHandle:
+    """Parsed document kept in session state
+    
+    Reruns only read the metadata; the full text is touched when extracting
+    concepts and the preview is sliced once per length.
+    """
+    
+    def __init__(self, meta: Dict[str, Any], text: str):
+        self.meta = meta
+        self._text = text
+        self._previews = {}
+    
+    def full(self) -> str:
+        """Full document text"""
+        return self._text
+    
+    def preview(self, max_chars: int = 1000) -> str:
+        """Text preview, computed on first use"""
+        if max_chars not in self._previews:
+            self._previews[max_chars] = DocumentParser.get_text_preview(self._text, max_chars)
+        return self._previews[max_chars]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _parse_cached(filename: str, digest: str, _data: bytes) -> Dict[str, Any]:
+    """Parse document bytes, cached on filename and content digest"""
+    return _get_parser().parse_bytes(filename, _data)
+
+
+def _parse_upload(filename: str, data: bytes) -> Dict[str, Any]:
+    """Parse the upload while the extraction tokenizer loads in the background"""
+    prefetch_tokenizer()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return _parse_cached(filename, digest, data)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _render_graph_html(export_data_json: bytes, graph_height: str, physics_enabled: bool,
+                       show_labels: bool, node_size_factor: float, font_size: int,
+                       show_node_labels: bool) -> str:
+    """Build the pyvis graph and return its HTML, cached on the export data and display options"""
+    from pyvis.network import Network
+    
+    export_data = _load_json(export_data_json)
+    
+    net = Network(
+        height=graph_height,
+        width="100%",
+        bgcolor="#ffffff",
+        font_color="black",
+        directed=True
+    )
+    
+    # Configure physics and interaction
+    net.options = _graph_options(physics_enabled, font_size, len(export_data['nodes']))
+    
+    _set_graph_elements(
+        net,
+        export_data,
+        node_size_factor=node_size_factor,
+        font_size=font_size,
+        show_labels=show_labels,
+        show_node_labels=show_node_labels
+    )
+    
+    return net.generate_html(notebook=False)
+
+
+def _dump_json(data: Dict[str, Any], indent: bool = True) -> bytes:
+    """Serialize data as JSON bytes, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(data, indent=2).encode('utf-8')
+    return json.dumps(data, separators=(",", ":")).encode('utf-8')
+
+
+def _load_json(data: bytes) -> Any:
+    """Parse JSON text or bytes, using orjson when it's installed"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _store_graph(extraction_result: Dict[str, Any]) -> None:
+    """Build the concept graph for an extraction result and store it in session state"""
+    graph_builder = GraphBuilder()
+    graph_builder.build_graph(
+        extraction_result['concepts'],
+        extraction_result['relationships']
+    )
+    
+    export_data = graph_builder.export_graph_data()
+    st.session_state.graph_data = {
+        'extraction_result': extraction_result,
+        'graph_builder': graph_builder,
+        'export_data': export_data,
+        # Serialized once here instead of on every rerun
+        '_json_bytes': _dump_json(extraction_result),
+        '_export_json': _dump_json(export_data, indent=False),
+        # When the graph was built, stamped into the downloaded summaries
+        'processed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def _show_batch_status() -> None:
+    """Poll the pending batch job and show its status, building the graph once it completes"""
+    job = st.session_state.batch_job
+    extractor = _get_extractor(st.session_state.api_key)
+    result = extractor.retrieve_batch(job['id'], job['max_concepts'])
+    
+    if "error" in result:
+        st.session_state.batch_job = None
+        st.error(f"Error extracting concepts: {result['error']}")
+    elif "status" in result:
+        st.info(
+            f"⏳ **Batch job in progress** ({result['status']})\n\n"
+            f"Sections completed: {result['completed']}/{result['total']}\n\n"
+            f"Job ID: `{job['id']}`"
+        )
+        col_refresh, col_cancel = st.columns(2)
+        with col_refresh:
+            st.button("🔄 Check status", use_container_width=True)
+        with col_cancel:
+            if st.button("✖️ Stop waiting", use_container_width=True):
+                st.session_state.batch_job = None
+                st.rerun()
+    else:
+        st.session_state.batch_job = None
+        _store_graph(result)
+        st.success("✅ Batch job finished, concepts extracted and graph built!")
+        _warn_partial_extraction(result)
+
+
+def _warn_partial_extraction(extraction_result: Dict[str, Any]) -> None:
+    """Warn when some document sections failed and the graph covers only the rest"""
+    if extraction_result.get('failed_sections'):
+        st.warning(
+            f"⚠️ {extraction_result['failed_sections']} of {extraction_result['total_sections']} "
+            "document sections could not be analyzed; the graph covers the remaining sections."
+        )
+
+
+def _text_column(values: List[Any]) -> pa.Array:
+    """String column for the detail tables; missing values show as empty"""
+    return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _score_column(values: List[Any]) -> pa.Array:
+    """Score column for the detail tables; scores are already numbers after extraction validation"""
+    return pa.array(values)
+
+
+def _truncate(descriptions: List[Any], max_chars: int = 100) -> pa.Array:
+    """Truncate long descriptions for table display"""
+    descriptions = _text_column(descriptions)
+    truncated = pc.binary_join_element_wise(
+        pc.utf8_slice_codeunits(descriptions, 0, max_chars), '...', ''
+    )
+    return pc.if_else(pc.greater(pc.utf8_length(descriptions), max_chars), truncated, descriptions)
+
+
+def _detail_tables(extraction_result: Dict[str, Any]) -> Tuple[Optional[pa.Table], Optional[pa.Table]]:
+    """Build the concept and relationship tables, or None when there are no rows"""
+    # Build Arrow tables directly so Streamlit skips pandas type inference
+    concepts = extraction_result['concepts']
+    concepts_table = pa.table({
+        'Name': _text_column([c['name'] for c in concepts]),
+        'Type': _text_column([c['type'] for c in concepts]),
+        'Importance': _score_column([c['importance'] for c in concepts]),
+        'Description': _truncate([c['description'] for c in concepts])
+    }) if concepts else None
+    
+    relationships = extraction_result['relationships']
+    relationships_table = pa.table({
+        'Source': _text_column([r['source'] for r in relationships]),
+        'Target': _text_column([r['target'] for r in relationships]),
+        'Type': _text_column([r['relationship_type'] for r in relationships]),
+        'Strength': _score_column([r['strength'] for r in relationships]),
+        'Description': _truncate([r['description'] for r in relationships])
+    }) if relationships else None
+    
+    return concepts_table, relationships_table
+
+
+# Stands in for the processing time in the cached exports, which are shared
+# across sessions; _stamp_processed_at fills in each session's own time
+_PROCESSED_AT_MARKER = "%%PROCESSED_AT%%"
+
+# Stands in for the ~700KB vis-network bundle in the cached HTML report;
+# _finish_report inlines it when the report is downloaded
+_VIS_HEAD_MARKER = "<!-- vis-network -->"
+
+
+def _stamp_processed_at(data: bytes, processed_at: str) -> bytes:
+    """Fill the processing time into an export built by _prepare_export"""
+    return data.replace(_PROCESSED_AT_MARKER.encode('utf-8'), processed_at.encode('utf-8'), 1)
+
+
+def _finish_report(report: bytes, processed_at: str) -> bytes:
+    """Complete a cached HTML report with the processing time and the vis-network assets"""
+    return _stamp_processed_at(report, processed_at).replace(
+        _VIS_HEAD_MARKER.encode('utf-8'), _vis_head_html().encode('utf-8'), 1
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _prepare_export(extraction_json: bytes, doc_info_json: str,
+                    _extraction_result: Dict[str, Any], _export_data: Dict[str, Any]) -> Tuple[bytes, bytes, bytes]:
+    """Build the text summary and HTML report as UTF-8 bytes, cached on the extraction result and document info
+    
+    Both carry _PROCESSED_AT_MARKER in place of the processing time, and the
+    report carries _VIS_HEAD_MARKER in place of the vis-network assets.
+    """
+    doc_info = json.loads(doc_info_json)
+    ai_summary = _extraction_result.get('summary', 'No AI summary available')
+    stats = _export_data['statistics']
+    concepts = _extraction_result.get('concepts', [])
+    relationships = _extraction_result.get('relationships', [])
+    sorted_concepts = sorted(concepts, key=lambda x: x.get('importance', 0), reverse=True)
+    
+    # Create text summary for simple download
+    summary_parts = [f"""CONTEXT GRAPH EXPLORER - DOCUMENT ANALYSIS SUMMARY
+================================================================
+
+Document Information:
+- Filename: {doc_info.get('filename', 'Unknown')}
+- File Type: {doc_info.get('file_type', 'Unknown')}
+- Processing Date: {_PROCESSED_AT_MARKER}
+
+Graph Statistics:
+- Total Concepts: {stats.get('nodes', 0)}
+- Total Relationships: {stats.get('edges', 0)}
+- Graph Density: {stats.get('density', 0):.3f}
+- Connected Components: {'Yes' if stats.get('is_connected', False) else 'No'}
+
+AI-Generated Summary:
+{ai_summary}
+
+Key Concepts Identified:
+"""]
+    
+    for i, concept in enumerate(sorted_concepts[:10], 1):
+        summary_parts.append(f"{i}. {concept.get('name', 'Unknown')} (Importance: {concept.get('importance', 0)})\n")
+        if concept.get('description'):
+            summary_parts.append(f"   Description: {concept.get('description', '')}\n")
+        summary_parts.append("\n")
+    
+    # Add relationship types summary
+    relationship_types = Counter(rel.get('relationship_type', 'unknown') for rel in relationships)
+    
+    if relationship_types:
+        summary_parts.append("\nRelationship Types Found:\n")
+        summary_parts.extend(
+            f"- {rel_type}: {count} relationships\n"
+            for rel_type, count in relationship_types.most_common()
+        )
+    
+    summary_parts.append("\n\nGenerated by Context Graph Explorer\nPowered by OpenAI GPT-4o")
+    text_summary = "".join(summary_parts)
+    
+    # Generate HTML report
+    html_report_content = generate_comprehensive_html_report(
+        doc_info, stats, ai_summary, sorted_concepts,
+        relationships, relationship_types, _export_data,
+        processed_at=_PROCESSED_AT_MARKER, vis_head=_VIS_HEAD_MARKER
+    )
+    
+    # Encoded once here so the download buttons don't re-encode on every rerun
+    return (
+        text_summary.encode('utf-8'),
+        html_report_content.encode('utf-8'),
+        ai_summary.encode('utf-8')
+    )
+
+
+# Newer Streamlit versions accept a callable as download data and only run it
+# on click, instead of storing a copy of the payload on every rerun
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    _DEFERRED_DOWNLOADS = hasattr(MediaFileManager, "add_deferred")
+except ImportError:
+    _DEFERRED_DOWNLOADS = False
+
+# Fragments rerun only the decorated function when its own widgets change
+# (st.fragment in Streamlit >= 1.37, st.experimental_fragment from 1.33);
+# older versions fall back to a full script rerun
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+@_fragment
+def _render_graph_panel():
+    """Render the concept graph panel with its visualization options"""
+    st.header("🌐 Concept Graph")
+    
+    if st.session_state.graph_data:
+        graph_data = st.session_state.graph_data
+        export_data = graph_data['export_data']
+        
+        # Rendered artifacts for the current graph; reruns that change nothing
+        # skip serializing the export data and rebuilding the tables
+        render_cache = st.session_state._render_cache
+        if render_cache.get('graph_data') is not graph_data:
+            render_cache.clear()
+            render_cache['graph_data'] = graph_data
+            render_cache['tables'] = _detail_tables(graph_data['extraction_result'])
+        
+        # Graph statistics
+        stats = export_data['statistics']
+        if 'error' not in stats:
+            col_stat1, col_stat2, col_stat3 = st.columns(3)
+            with col_stat1:
+                st.metric("Concepts", stats['nodes'])
+            with col_stat2:
+                st.metric("Relationships", stats['edges'])
+            with col_stat3:
+                st.metric("Density", f"{stats['density']:.3f}")
+        
+        # Graph display options; these widgets live inside the fragment so
+        # changing them only reruns this panel
+        with st.expander("🎛️ Visualization Options"):
+            col_opt1, col_opt2 = st.columns(2)
+            with col_opt1:
+                physics_enabled = st.checkbox(
+                    "Enable physics simulation",
+                    value=True,
+                    help="Enable interactive physics for the graph"
+                )
+                
+                show_labels = st.checkbox(
+                    "Show relationship labels",
+                    value=True,
+                    help="Display relationship types on edges"
+                )
+                
+                # Node label display
+                show_node_labels = st.checkbox(
+                    "Show node labels",
+                    value=True,
+                    help="Display concept names on nodes"
+                )
+            
+            with col_opt2:
+                node_size_factor = st.slider(
+                    "Node size factor:",
+                    min_value=1.0,
+                    max_value=3.0,
+                    value=1.5,
+                    step=0.1,
+                    help="Adjust the size of nodes in the graph"
+                )
+                
+                # Font size
+                font_size = st.slider(
+                    "Font size:",
+                    min_value=8,
+                    max_value=24,
+                    value=14,
+                    help="Adjust the font size of node labels"
+                )
+        
+        graph_height = st.selectbox(
+            "Graph height:",
+            options=["600px", "800px", "1000px", "1200px"],
+            index=1,
+            help="Select the height of the graph visualization"
+        )
+        
+        # Create and display the graph
+        try:
+            html_options = (graph_height, physics_enabled, show_labels, node_size_factor,
+                            font_size, show_node_labels)
+            if render_cache.get('html_options') != html_options:
+                render_cache['html'] = _render_graph_html(graph_data['_export_json'], *html_options)
+                render_cache['html_options'] = html_options
+            html_content = render_cache['html']
+            
+            # Display in expandable container
+            with st.container():
+                st.markdown("### 🌐 Interactive Graph")
+                st.markdown("*Drag nodes, zoom, and pan to explore. Hover over nodes for details.*")
+                
+                # Convert height string to integer for st.components
+                height_px = int(graph_height.replace('px', ''))
+                st.components.v1.html(html_content, height=height_px, scrolling=True)
+            
+            # Add graph controls
+            col_tip, col_download = st.columns([2, 1])
+            with col_tip:
+                st.info("💡 **Tip**: Use browser's fullscreen mode (F11) for better graph exploration!")
+            with col_download:
+                # Download graph as HTML
+                st.download_button(
+                    label="📱 Download Graph HTML",
+                    # Deferred: the HTML is only handed over when the button is clicked
+                    data=(lambda: html_content) if _DEFERRED_DOWNLOADS else html_content,
+                    file_name="concept_graph.html",
+                    mime="text/html",
+                    help="Download the graph as a standalone HTML file for full-screen viewing"
+                )
+                
+        except Exception as e:
+            st.error(f"Error creating graph visualization: {str(e)}")
+        
+        # Concept details
+        with st.expander("📊 Concept Details"):
+            extraction_result = graph_data['extraction_result']
+            
+            concepts_table, relationships_table = render_cache['tables']
+            
+            st.subheader("Key Concepts")
+            if concepts_table is not None:
+                st.dataframe(concepts_table, use_container_width=True)
+            
+            st.subheader("Relationships")
+            if relationships_table is not None:
+                st.dataframe(relationships_table, use_container_width=True)
+        
+        # Export options
+        with st.expander("💾 Export Options"):
+            st.subheader("Download Graph Data")
+            
+            # JSON export
+            st.download_button(
+                label="📄 Download as JSON",
+                data=graph_data['_json_bytes'],
+                file_name="concept_graph.json",
+                mime="application/json"
+            )
+            
+            doc_info = st.session_state.document_data.meta
+            file_stem = os.path.splitext(doc_info.get('filename', 'document'))[0]
+            text_summary_bytes, html_report_bytes, ai_summary_bytes = _prepare_export(
+                graph_data['_json_bytes'],
+                json.dumps(doc_info, sort_keys=True, default=str),
+                extraction_result,
+                export_data
+            )
+            processed_at = graph_data['processed_at']
+            text_summary_bytes = _stamp_processed_at(text_summary_bytes, processed_at)
+            html_report = lambda: _finish_report(html_report_bytes, processed_at)
+            
+            # Create three columns for download buttons
+            col_summary1, col_summary2, col_summary3 = st.columns(3)
+            
+            with col_summary1:
+                st.download_button(
+                    label="📊 HTML Report",
+                    data=html_report if _DEFERRED_DOWNLOADS else html_report(),
+                    file_name=f"{file_stem}_analysis_report.html",
+                    mime="text/html",
+                    help="Download interactive HTML report with embedded graph",
+                    use_container_width=True
+                )
+            
+            with col_summary2:
+                st.download_button(
+                    label="📝 Text Analysis",
+                    data=text_summary_bytes,
+                    file_name=f"{file_stem}_analysis_summary.txt",
+                    mime="text/plain",
+                    help="Download text-based analysis summary",
+                    use_container_width=True
+                )
+            
+            with col_summary3:
+                st.download_button(
+                    label="🤖 AI Summary Only",
+                    data=ai_summary_bytes,
+                    file_name=f"{file_stem}_ai_summary.txt",
+                    mime="text/plain",
+                    help="Download just the AI-generated summary",
+                    use_container_width=True
+                )
+    
+    else:
+        st.info("👆 Upload a document and extract concepts to see the graph visualization")
+        
+        # Show example/demo
+        st.subheader("🎯 How it works:")
+        st.markdown("""
+        1. **Upload** a document (PDF, DOCX, TXT, or Markdown)
+        2. **Parse** the document to extract text content
+        3. **Extract** key concepts using AI (GPT-4o)
+        4. **Visualize** concepts and relationships as an interactive graph
+        5. **Explore** the graph to understand document structure
+        6. **Export** results for further analysis
+        
+        **Supported formats:**
+        - 📄 PDF documents
+        - 📝 Word documents (DOCX)
+        - 📋 Text files (TXT)
+        - 📖 Markdown files (MD)
+        """)
+
 
 def main():
     """Main application function"""
@@ -272,44 +853,10 @@ def main():
             help="Maximum number of concepts to extract from the document"
         )
         
-        # Graph visualization options
-        st.subheader("Visualization Options")
-        
-        physics_enabled = st.checkbox(
-            "Enable physics simulation",
-            value=True,
-            help="Enable interactive physics for the graph"
-        )
-        
-        show_labels = st.checkbox(
-            "Show relationship labels",
-            value=True,
-            help="Display relationship types on edges"
-        )
-        
-        node_size_factor = st.slider(
-            "Node size factor:",
-            min_value=1.0,
-            max_value=3.0,
-            value=1.5,
-            step=0.1,
-            help="Adjust the size of nodes in the graph"
-        )
-        
-        # Font size
-        font_size = st.slider(
-            "Font size:",
-            min_value=8,
-            max_value=24,
-            value=14,
-            help="Adjust the font size of node labels"
-        )
-        
-        # Node label display
-        show_node_labels = st.checkbox(
-            "Show node labels",
-            value=True,
-            help="Display concept names on nodes"
+        batch_mode = st.checkbox(
+            "Async batch (cheaper, slower)",
+            value=False,
+            help="Submit extraction as an OpenAI Batch API job: half the cost, but results can take up to 24 hours"
         )
     
     # Main content area
@@ -335,19 +882,20 @@ def main():
             # Parse document button
             if st.button("📖 Parse Document", type="primary"):
                 with st.spinner("Parsing document..."):
-                    parser = DocumentParser()
-                    document_data = parser.parse_document(uploaded_file)
+                    document_data = _parse_upload(uploaded_file.name, uploaded_file.getvalue())
                     
                     if "error" in document_data:
                         st.error(f"Error parsing document: {document_data['error']}")
                     else:
-                        st.session_state.document_data = document_data
+                        text_content = document_data.pop('text_content')
+                        st.session_state.document_data = _DocHandle(document_data, text_content)
                         st.success("✅ Document parsed successfully!")
         
         # Show document info
         if st.session_state.document_data:
             st.subheader("📋 Document Info")
-            doc_data = st.session_state.document_data
+            document = st.session_state.document_data
+            doc_data = document.meta
             
             st.write(f"**Filename:** {doc_data['filename']}")
             st.write(f"**Type:** {doc_data['file_type']}")
@@ -363,345 +911,53 @@ def main():
             
             # Text preview
             with st.expander("📝 Text Preview"):
-                parser = DocumentParser()
-                preview = parser.get_text_preview(doc_data['text_content'], 1000)
+                preview = document.preview(1000)
                 st.text_area("Document content preview:", preview, height=200, disabled=True)
             
             # Extract concepts button
             if st.session_state.api_key:
-                if st.button("🧠 Extract Concepts", type="primary"):
-                    with st.spinner("Extracting concepts using AI..."):
-                        extractor = ConceptExtractor(st.session_state.api_key)
-                        extraction_result = extractor.extract_concepts(
-                            doc_data['text_content'], 
-                            max_concepts
-                        )
+                if st.session_state.batch_job:
+                    _show_batch_status()
+                elif st.button("🧠 Extract Concepts", type="primary"):
+                    extractor = _get_extractor(st.session_state.api_key)
+                    
+                    if batch_mode:
+                        with st.spinner("Submitting batch job..."):
+                            submission = extractor.submit_batch(document.full(), max_concepts)
                         
-                        if "error" in extraction_result:
-                            st.error(f"Error extracting concepts: {extraction_result['error']}")
+                        if "error" in submission:
+                            st.error(f"Error extracting concepts: {submission['error']}")
                         else:
-                            # Build graph
-                            graph_builder = GraphBuilder()
-                            graph_builder.build_graph(
-                                extraction_result['concepts'],
-                                extraction_result['relationships']
-                            )
-                            
-                            # Store graph data
-                            st.session_state.graph_data = {
-                                'extraction_result': extraction_result,
-                                'graph_builder': graph_builder,
-                                'export_data': graph_builder.export_graph_data()
+                            st.session_state.batch_job = {
+                                'id': submission['batch_id'],
+                                'max_concepts': max_concepts
                             }
+                            _show_batch_status()
+                    else:
+                        with st.spinner("Extracting concepts using AI..."):
+                            progress_bar = st.progress(0.0)
+                            
+                            def update_progress(completed, total):
+                                progress_bar.progress(completed / total, text=f"Analyzing document... {completed / total:.0%}")
                             
-                            st.success("✅ Concepts extracted and graph built!")
+                            extraction_result = extractor.extract_concepts(
+                                document.full(), 
+                                max_concepts,
+                                progress_callback=update_progress
+                            )
+                            progress_bar.empty()
+                            
+                            if "error" in extraction_result:
+                                st.error(f"Error extracting concepts: {extraction_result['error']}")
+                            else:
+                                _store_graph(extraction_result)
+                                st.success("✅ Concepts extracted and graph built!")
+                                _warn_partial_extraction(extraction_result)
             else:
                 st.warning("⚠️ Please enter your OpenAI API key to extract concepts")
     
     with col2:
-        st.header("🌐 Concept Graph")
-        
-        if st.session_state.graph_data:
-            graph_data = st.session_state.graph_data
-            export_data = graph_data['export_data']
-            
-            # Graph statistics
-            stats = export_data['statistics']
-            if 'error' not in stats:
-                col_stat1, col_stat2, col_stat3 = st.columns(3)
-                with col_stat1:
-                    st.metric("Concepts", stats['nodes'])
-                with col_stat2:
-                    st.metric("Relationships", stats['edges'])
-                with col_stat3:
-                    st.metric("Density", f"{stats['density']:.3f}")
-            
-            # Graph display options
-            graph_height = st.selectbox(
-                "Graph height:",
-                options=["600px", "800px", "1000px", "1200px"],
-                index=1,
-                help="Select the height of the graph visualization"
-            )
-            
-            # Create and display the graph
-            try:
-                net = Network(
-                    height=graph_height,
-                    width="100%",
-                    bgcolor="#ffffff",
-                    font_color="black",
-                    directed=True
-                )
-                
-                # Configure physics and interaction
-                if physics_enabled:
-                    net.set_options(f"""
-                    var options = {{
-                      "physics": {{
-                        "enabled": true,
-                        "stabilization": {{"iterations": 100}},
-                        "barnesHut": {{"gravitationalConstant": -8000, "springConstant": 0.001}}
-                      }},
-                      "interaction": {{
-                        "dragNodes": true,
-                        "dragView": true,
-                        "zoomView": true
-                      }},
-                      "nodes": {{
-                        "font": {{"size": {font_size}}}
-                      }},
-                      "edges": {{
-                        "font": {{"size": {max(8, font_size - 2)}}}
-                      }}
-                    }}
-                    """)
-                else:
-                    net.set_options(f"""
-                    var options = {{
-                      "physics": {{"enabled": false}},
-                      "interaction": {{
-                        "dragNodes": true,
-                        "dragView": true,
-                        "zoomView": true
-                      }},
-                      "nodes": {{
-                        "font": {{"size": {font_size}}}
-                      }},
-                      "edges": {{
-                        "font": {{"size": {max(8, font_size - 2)}}}
-                      }}
-                    }}
-                    """)
-                
-                # Add nodes
-                for node in export_data['nodes']:
-                    # Color nodes by type
-                    type_colors = {
-                        'category': '#ff9999',
-                        'entity': '#66b3ff',
-                        'process': '#99ff99',
-                        'definition': '#ffcc99',
-                        'other': '#ff99cc'
-                    }
-                    color = type_colors.get(node['type'], '#cccccc')
-                    
-                    # Configure node label
-                    node_label = node['label'] if show_node_labels else ""
-                    
-                    net.add_node(
-                        node['id'],
-                        label=node_label,
-                        title=f"{node['title']}\nType: {node['type']}\nImportance: {node['importance']}",
-                        size=int(node['size'] * node_size_factor),
-                        color=color,
-                        font={'size': font_size, 'color': 'black'}
-                    )
-                
-                # Add edges
-                for edge in export_data['edges']:
-                    label = edge['label'] if show_labels else ""
-                    net.add_edge(
-                        edge['from'],
-                        edge['to'],
-                        label=label,
-                        title=f"{edge['label']}: {edge['title']}",
-                        width=edge['width'],
-                        arrows="to"
-                    )
-                
-                # Generate and display the graph
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as tmp_file:
-                    net.save_graph(tmp_file.name)
-                    
-                    with open(tmp_file.name, 'r', encoding='utf-8') as f:
-                        html_content = f.read()
-                    
-                    # Display in expandable container
-                    with st.container():
-                        st.markdown("### 🌐 Interactive Graph")
-                        st.markdown("*Drag nodes, zoom, and pan to explore. Hover over nodes for details.*")
-                        
-                        # Convert height string to integer for st.components
-                        height_px = int(graph_height.replace('px', ''))
-                        st.components.v1.html(html_content, height=height_px, scrolling=True)
-                    
-                    # Add graph controls
-                    col_tip, col_download = st.columns([2, 1])
-                    with col_tip:
-                        st.info("💡 **Tip**: Use browser's fullscreen mode (F11) for better graph exploration!")
-                    with col_download:
-                        # Download graph as HTML
-                        st.download_button(
-                            label="📱 Download Graph HTML",
-                            data=html_content,
-                            file_name="concept_graph.html",
-                            mime="text/html",
-                            help="Download the graph as a standalone HTML file for full-screen viewing"
-                        )
-                    
-                    # Clean up temporary file
-                    os.unlink(tmp_file.name)
-                    
-            except Exception as e:
-                st.error(f"Error creating graph visualization: {str(e)}")
-            
-            # Concept details
-            with st.expander("📊 Concept Details"):
-                extraction_result = graph_data['extraction_result']
-                
-                st.subheader("Key Concepts")
-                concepts_df_data = []
-                for concept in extraction_result['concepts']:
-                    concepts_df_data.append({
-                        'Name': concept['name'],
-                        'Type': concept['type'],
-                        'Importance': concept['importance'],
-                        'Description': concept['description'][:100] + '...' if len(concept['description']) > 100 else concept['description']
-                    })
-                
-                if concepts_df_data:
-                    st.dataframe(concepts_df_data, use_container_width=True)
-                
-                st.subheader("Relationships")
-                relationships_df_data = []
-                for rel in extraction_result['relationships']:
-                    relationships_df_data.append({
-                        'Source': rel['source'],
-                        'Target': rel['target'],
-                        'Type': rel['relationship_type'],
-                        'Strength': rel['strength'],
-                        'Description': rel['description'][:100] + '...' if len(rel['description']) > 100 else rel['description']
-                    })
-                
-                if relationships_df_data:
-                    st.dataframe(relationships_df_data, use_container_width=True)
-            
-            # Export options
-            with st.expander("💾 Export Options"):
-                st.subheader("Download Graph Data")
-                
-                # JSON export
-                json_data = json.dumps(graph_data['extraction_result'], indent=2)
-                st.download_button(
-                    label="📄 Download as JSON",
-                    data=json_data,
-                    file_name="concept_graph.json",
-                    mime="application/json"
-                )
-                
-                # Enhanced Summary export
-                ai_summary = extraction_result.get('summary', 'No AI summary available')
-                
-                # Create comprehensive summary
-                doc_info = st.session_state.document_data
-                stats = graph_data['export_data']['statistics']
-                concepts = extraction_result.get('concepts', [])
-                relationships = extraction_result.get('relationships', [])
-                sorted_concepts = sorted(concepts, key=lambda x: x.get('importance', 0), reverse=True)
-                
-                # Create text summary for simple download
-                text_summary = f"""CONTEXT GRAPH EXPLORER - DOCUMENT ANALYSIS SUMMARY
-================================================================
-
-Document Information:
-- Filename: {doc_info.get('filename', 'Unknown')}
-- File Type: {doc_info.get('file_type', 'Unknown')}
-- Processing Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Graph Statistics:
-- Total Concepts: {stats.get('nodes', 0)}
-- Total Relationships: {stats.get('edges', 0)}
-- Graph Density: {stats.get('density', 0):.3f}
-- Connected Components: {'Yes' if stats.get('is_connected', False) else 'No'}
-
-AI-Generated Summary:
-{ai_summary}
-
-Key Concepts Identified:
-"""
-                
-                for i, concept in enumerate(sorted_concepts[:10], 1):
-                    text_summary += f"{i}. {concept.get('name', 'Unknown')} (Importance: {concept.get('importance', 0)})\n"
-                    if concept.get('description'):
-                        text_summary += f"   Description: {concept.get('description', '')}\n"
-                    text_summary += "\n"
-                
-                # Add relationship types summary
-                relationship_types = {}
-                for rel in relationships:
-                    rel_type = rel.get('relationship_type', 'unknown')
-                    relationship_types[rel_type] = relationship_types.get(rel_type, 0) + 1
-                
-                if relationship_types:
-                    text_summary += "\nRelationship Types Found:\n"
-                    for rel_type, count in sorted(relationship_types.items(), key=lambda x: x[1], reverse=True):
-                        text_summary += f"- {rel_type}: {count} relationships\n"
-                
-                text_summary += f"\n\nGenerated by Context Graph Explorer\nPowered by OpenAI GPT-4o"
-                
-                # Create HTML report function
-                def create_html_report():
-                    return generate_comprehensive_html_report(
-                        doc_info, stats, ai_summary, sorted_concepts, 
-                        relationships, relationship_types, export_data
-                    )
-                
-                # Generate HTML report
-                html_report_content = create_html_report()
-                
-                # Create three columns for download buttons
-                col_summary1, col_summary2, col_summary3 = st.columns(3)
-                
-                with col_summary1:
-                    st.download_button(
-                        label="📊 HTML Report",
-                        data=html_report_content,
-                        file_name=f"{doc_info.get('filename', 'document').split('.')[0]}_analysis_report.html",
-                        mime="text/html",
-                        help="Download interactive HTML report with embedded graph",
-                        use_container_width=True
-                    )
-                
-                with col_summary2:
-                    st.download_button(
-                        label="📝 Text Analysis",
-                        data=text_summary,
-                        file_name=f"{doc_info.get('filename', 'document').split('.')[0]}_analysis_summary.txt",
-                        mime="text/plain",
-                        help="Download text-based analysis summary",
-                        use_container_width=True
-                    )
-                
-                with col_summary3:
-                    st.download_button(
-                        label="🤖 AI Summary Only",
-                        data=ai_summary,
-                        file_name=f"{doc_info.get('filename', 'document').split('.')[0]}_ai_summary.txt",
-                        mime="text/plain",
-                        help="Download just the AI-generated summary",
-                        use_container_width=True
-                    )
-        
-        else:
-            st.info("👆 Upload a document and extract concepts to see the graph visualization")
-            
-            # Show example/demo
-            st.subheader("🎯 How it works:")
-            st.markdown("""
-            1. **Upload** a document (PDF, DOCX, TXT, or Markdown)
-            2. **Parse** the document to extract text content
-            3. **Extract** key concepts using AI (GPT-4o)
-            4. **Visualize** concepts and relationships as an interactive graph
-            5. **Explore** the graph to understand document structure
-            6. **Export** results for further analysis
-            
-            **Supported formats:**
-            - 📄 PDF documents
-            - 📝 Word documents (DOCX)
-            - 📋 Text files (TXT)
-            - 📖 Markdown files (MD)
-            """)
+        _render_graph_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,32 +3,249 @@ Graph utilities for Context Graph Explorer
 Handles concept extraction, relationship building, and graph generation
 """
 
+import asyncio
+import copy
+import hashlib
 import json
+import math
+import queue
 import re
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import wait
+from functools import lru_cache
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import streamlit as st
-import networkx as nx
 
 # OpenAI integration
 try:
     import openai
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
 except ImportError:
     st.error("OpenAI library not installed. Please install it using: pip install openai")
 
+# Token counting for document chunking
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Faster JSON parsing when available; orjson.JSONDecodeError subclasses json.JSONDecodeError
+try:
+    import orjson
+    _loads_json = orjson.loads
+except ImportError:
+    _loads_json = json.loads
+
 from prompts import (
     create_extraction_prompt,
+    create_extraction_prompts,
     create_refinement_prompt,
     create_grouping_prompt,
     create_validation_prompt
 )
 
+EXTRACTION_MODEL = "gpt-4o"
+EXTRACTION_SYSTEM_PROMPT = (
+    "You are an expert document analyzer specializing in concept extraction and relationship mapping. "
+    "Respond only with a JSON object."
+)
+
+# JSON mode: the model returns a bare JSON object, so no regex extraction is needed
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Node colors by concept type
+TYPE_COLORS = {
+    'category': '#ff9999',
+    'entity': '#66b3ff',
+    'process': '#99ff99',
+    'definition': '#ffcc99',
+    'other': '#ff99cc'
+}
+DEFAULT_TYPE_COLOR = '#cccccc'
+
+# Completion budget per extraction request, and how many streamed tokens
+# arrive between progress updates
+MAX_COMPLETION_TOKENS = 4000
+STREAM_PROGRESS_EVERY = 50
+
+# Batch API job states after which polling stops
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Documents longer than this are split and analyzed concurrently
+CHUNK_TOKENS = 4000
+
+# Recent extraction results keyed by (model, API key hash, document hash, max_concepts);
+# the API key is part of the key so one account's results are never served to another
+EXTRACTION_CACHE_SIZE = 64
+_EXTRACTION_CACHE: "OrderedDict[Tuple[str, str, str, int], Dict[str, Any]]" = OrderedDict()
+_EXTRACTION_CACHE_LOCK = threading.Lock()
+
+# Tokenizer loaded by _get_encoding; a failed load is retried after this many seconds
+ENCODING_RETRY_SECONDS = 300
+_encoding = None
+_encoding_failed_at = float('-inf')
+_ENCODING_LOCK = threading.Lock()
+
+# Concept ID normalization: drop punctuation, then join words with underscores
+_ID_STRIP_RE = re.compile(r'[^\w\s-]')
+_ID_COLLAPSE_RE = re.compile(r'[\s-]+')
+
+# Most chunk requests in flight at once, to stay under the API rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
+# Smallest chunk size the context-length fallback will shrink to
+MIN_CHUNK_TOKENS = 500
+
+# Chunk boundaries: after sentence-ending punctuation or at paragraph breaks
+SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+
+def _get_encoding():
+    """Load the tokenizer for the extraction model once per process
+    
+    Only a successful load is kept. After a failure (e.g. no network to
+    download the encoding) chunking falls back to its character estimate,
+    and the load is retried once ENCODING_RETRY_SECONDS have passed.
+    """
+    global _encoding, _encoding_failed_at
+    if _encoding is not None or tiktoken is None:
+        return _encoding
+    with _ENCODING_LOCK:
+        if _encoding is None and time.monotonic() - _encoding_failed_at >= ENCODING_RETRY_SECONDS:
+            try:
+                try:
+                    _encoding = tiktoken.encoding_for_model(EXTRACTION_MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding_failed_at = time.monotonic()
+    return _encoding
+
+
+def prefetch_tokenizer() -> None:
+    """Start loading the tokenizer in the background ahead of the first extraction
+    
+    tiktoken may download its encoding; nothing waits on it, and a failed
+    load leaves chunking on its character estimate.
+    """
+    threading.Thread(target=_get_encoding, daemon=True).start()
+
+
+@lru_cache(maxsize=4096)
+def _normalize_id(concept_id: str) -> str:
+    """Lowercase a concept ID, drop punctuation and join words with underscores
+    
+    Cached because the same IDs recur across chunks and relationships.
+    """
+    cleaned = _ID_STRIP_RE.sub('', concept_id.lower())
+    return _ID_COLLAPSE_RE.sub('_', cleaned).strip('_')
+
+
+def _as_score(value: Any, default: int) -> Any:
+    """An importance or strength score as an int or float, parsing numeric strings
+    
+    Returns default for anything that isn't a finite number.
+    """
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            try:
+                value = float(value.strip())
+            except ValueError:
+                return default
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return value
+    return default
+
+
+def _is_context_length_error(error: Exception) -> bool:
+    """Whether an OpenAI request failed because the prompt exceeded the model context"""
+    return getattr(error, 'code', None) == 'context_length_exceeded' or 'context length' in str(error)
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Split text after sentence ends and paragraph breaks, keeping the whitespace"""
+    pieces = []
+    start = 0
+    for match in SENTENCE_BREAK_RE.finditer(text):
+        pieces.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _count_tokens(text: str) -> int:
+    """Token count of text, or roughly four characters per token without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split document text into chunks of at most max_tokens tokens
+    
+    Chunks end on sentence or paragraph boundaries so concepts aren't cut in
+    half; a single sentence longer than max_tokens is split by tokens.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        # Roughly four characters per token when tiktoken is unavailable
+        count_tokens = lambda piece: len(piece) // 4 + 1
+    else:
+        count_tokens = lambda piece: len(encoding.encode(piece))
+    
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in _split_sentences(text):
+        sentence_tokens = count_tokens(sentence)
+        if current and current_tokens + sentence_tokens > max_tokens:
+            chunks.append("".join(current))
+            current = []
+            current_tokens = 0
+        if sentence_tokens > max_tokens:
+            chunks.extend(_split_by_tokens(sentence, max_tokens, encoding))
+            continue
+        current.append(sentence)
+        current_tokens += sentence_tokens
+    if current:
+        chunks.append("".join(current))
+    
+    return chunks
+
+
+def _split_by_tokens(text: str, max_tokens: int, encoding) -> List[str]:
+    """Split text into fixed token windows, ignoring sentence boundaries"""
+    if encoding is None:
+        window = max_tokens * 4
+        return [text[i:i + window] for i in range(0, len(text), window)]
+    tokens = encoding.encode(text)
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
 
 class ConceptExtractor:
     """Extract concepts and relationships from documents using OpenAI GPT-4o"""
     
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the concept extractor with OpenAI API key"""
+        self.api_key = api_key
+        # Lowered after a chunk overflows the model context, so later calls start smaller
+        self.chunk_tokens = CHUNK_TOKENS
+        # Event loop thread and async client for concurrent chunk requests,
+        # started on first use and kept so the connection pool is reused
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._async_client = None
         self.client = None
         if api_key:
             try:
@@ -36,38 +253,437 @@ class ConceptExtractor:
             except Exception as e:
                 st.error(f"Error initializing OpenAI client: {str(e)}")
     
-    def extract_concepts(self, document_text: str, max_concepts: int = 25) -> Dict[str, Any]:
-        """Extract concepts and relationships from document text"""
+    def extract_concepts(self, document_text: str, max_concepts: int = 25,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Extract concepts and relationships from document text
+        
+        Long documents are split into token windows that are analyzed
+        concurrently and merged into a single result. Complete results are
+        cached per model, API key and document hash, so repeating an
+        extraction costs no API calls.
+        """
         if not self.client:
             return {"error": "OpenAI client not initialized. Please provide a valid API key."}
         
+        cache_key = (
+            EXTRACTION_MODEL,
+            hashlib.blake2b(self.api_key.encode('utf-8'), digest_size=16).hexdigest(),
+            hashlib.blake2b(document_text.encode('utf-8'), digest_size=16).hexdigest(),
+            max_concepts
+        )
+        with _EXTRACTION_CACHE_LOCK:
+            cached = _EXTRACTION_CACHE.get(cache_key)
+            if cached is not None:
+                _EXTRACTION_CACHE.move_to_end(cache_key)
+        if cached is not None:
+            if progress_callback:
+                progress_callback(1, 1)
+            return copy.deepcopy(cached)
+        
+        result = self._extract(document_text, max_concepts, progress_callback)
+        # Partial results (some sections failed) aren't cached, so a retry can recover them
+        if "error" not in result and not result.get("failed_sections"):
+            with _EXTRACTION_CACHE_LOCK:
+                _EXTRACTION_CACHE[cache_key] = copy.deepcopy(result)
+                if len(_EXTRACTION_CACHE) > EXTRACTION_CACHE_SIZE:
+                    _EXTRACTION_CACHE.popitem(last=False)
+        return result
+    
+    def _extract(self, document_text: str, max_concepts: int,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Run the extraction requests for a document and merge their results"""
         try:
-            prompt = create_extraction_prompt(document_text, max_concepts)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are an expert document analyzer specializing in concept extraction and relationship mapping."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
+            chunk_tokens = self.chunk_tokens
+            chunks = split_into_chunks(document_text, chunk_tokens)
+            
+            if len(chunks) == 1:
+                try:
+                    content = self._complete(create_extraction_prompt(document_text, max_concepts), progress_callback)
+                    if progress_callback:
+                        progress_callback(1, 1)
+                    return self._parse_response(content)
+                except openai.BadRequestError as e:
+                    if not _is_context_length_error(e):
+                        raise
+                    chunks, chunk_tokens = self._shrink_chunk(document_text, e)
+            
+            chunk_contents, chunk_tokens = self._run_on_loop(
+                lambda report: self._complete_chunks(chunks, chunk_tokens, max_concepts, report),
+                progress_callback
             )
+            # Remember the smallest size that fit, once per call
+            self.chunk_tokens = min(self.chunk_tokens, chunk_tokens)
+            failures = [contents for contents in chunk_contents if isinstance(contents, Exception)]
+            if len(failures) == len(chunk_contents):
+                # Nothing came back; report why instead of a generic merge error
+                raise failures[0]
+            return self._merge_contents(
+                [content for contents in chunk_contents if not isinstance(contents, Exception) for content in contents],
+                max_concepts,
+                failed_sections=len(failures)
+            )
+                
+        except Exception as e:
+            return {"error": f"Error extracting concepts: {str(e)}"}
+    
+    def submit_batch(self, document_text: str, max_concepts: int = 25) -> Dict[str, Any]:
+        """Submit one extraction request per chunk as an OpenAI Batch API job
+        
+        Batch jobs are billed at half price but may take up to 24 hours;
+        use retrieve_batch to poll for the result.
+        """
+        if not self.client:
+            return {"error": "OpenAI client not initialized. Please provide a valid API key."}
+        
+        try:
+            prompts = create_extraction_prompts(split_into_chunks(document_text, self.chunk_tokens), max_concepts)
+            batch = self._create_batch([
+                self._batch_request(f"chunk-{i}", prompt)
+                for i, prompt in enumerate(prompts)
+            ])
+            return {"batch_id": batch.id, "status": batch.status}
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        except Exception as e:
+            return {"error": f"Error submitting batch job: {str(e)}"}
+    
+    def retrieve_batch(self, batch_id: str, max_concepts: int = 25) -> Dict[str, Any]:
+        """Poll a batch job and return the merged extraction result once it completes
+        
+        While the job is still running the result only contains its status
+        and request counts.
+        """
+        if not self.client:
+            return {"error": "OpenAI client not initialized. Please provide a valid API key."}
+        
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            
+            if batch.status in ("failed", "expired", "cancelled"):
+                return {"error": f"Batch job {batch.status}"}
+            
+            if batch.status != "completed":
+                counts = batch.request_counts
+                return {
+                    "status": batch.status,
+                    "completed": counts.completed if counts else 0,
+                    "total": counts.total if counts else 0
+                }
             
-            if json_match:
-                result = json.loads(json_match.group())
-                result = self._validate_extraction_result(result)
-                return result
+            contents = self._batch_contents(batch)
+            return self._merge_contents(
+                [contents[custom_id] for custom_id in sorted(contents, key=lambda cid: int(cid.split('-')[1]))],
+                max_concepts
+            )
+            
+        except Exception as e:
+            return {"error": f"Error retrieving batch job: {str(e)}"}
+    
+    def extract_concepts_batch(self, document_texts: List[str], max_concepts: int = 25,
+                               poll_interval: float = 30.0) -> List[Dict[str, Any]]:
+        """Extract concepts from several documents in one Batch API job
+        
+        Blocks until the job finishes, polling every poll_interval seconds,
+        and returns one extraction result (or error) per document, in order.
+        """
+        if not self.client:
+            return [{"error": "OpenAI client not initialized. Please provide a valid API key."}] * len(document_texts)
+        
+        try:
+            chunk_counts = []
+            requests = []
+            for doc_index, document_text in enumerate(document_texts):
+                prompts = create_extraction_prompts(split_into_chunks(document_text, self.chunk_tokens), max_concepts)
+                chunk_counts.append(len(prompts))
+                requests.extend(
+                    self._batch_request(f"doc-{doc_index}-chunk-{i}", prompt)
+                    for i, prompt in enumerate(prompts)
+                )
+            
+            batch = self._create_batch(requests)
+            while batch.status not in BATCH_FINAL_STATUSES:
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed":
+                return [{"error": f"Batch job {batch.status}"}] * len(document_texts)
+            
+            contents = self._batch_contents(batch)
+            return [
+                self._merge_contents(
+                    [contents.get(f"doc-{doc_index}-chunk-{i}") for i in range(chunk_count)],
+                    max_concepts
+                )
+                for doc_index, chunk_count in enumerate(chunk_counts)
+            ]
+            
+        except Exception as e:
+            return [{"error": f"Error running batch job: {str(e)}"}] * len(document_texts)
+    
+    def _batch_request(self, custom_id: str, prompt: str) -> str:
+        """Build one JSONL line of a Batch API input file"""
+        return json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": EXTRACTION_MODEL,
+                "messages": self._messages(prompt),
+                "temperature": 0.3,
+                "max_tokens": MAX_COMPLETION_TOKENS,
+                "response_format": JSON_RESPONSE_FORMAT
+            }
+        })
+    
+    def _create_batch(self, requests: List[str]):
+        """Upload the JSONL requests and start a Batch API job"""
+        batch_file = self.client.files.create(
+            file=("extraction_batch.jsonl", "\n".join(requests).encode('utf-8')),
+            purpose="batch"
+        )
+        return self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+    
+    def _batch_contents(self, batch) -> Dict[str, str]:
+        """Map custom_id to response content for the successful requests of a completed batch"""
+        output = self.client.files.content(batch.output_file_id).text
+        contents = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = _loads_json(line)
+            response = record.get('response') or {}
+            if response.get('status_code') == 200:
+                contents[record['custom_id']] = response['body']['choices'][0]['message']['content']
+        return contents
+    
+    def _merge_contents(self, contents: List[Optional[str]], max_concepts: int,
+                        failed_sections: int = 0) -> Dict[str, Any]:
+        """Parse per-chunk response contents and merge them into one extraction result
+        
+        Missing or unparseable contents count as failed sections; a partial
+        result records them in "failed_sections" and "total_sections".
+        """
+        results = []
+        first_error = None
+        for content in contents:
+            result = None if content is None else self._parse_response(content)
+            if result is None or "error" in result:
+                failed_sections += 1
+                if first_error is None and result is not None:
+                    first_error = result["error"]
             else:
+                results.append(result)
+        
+        if not results:
+            return {"error": first_error or "Could not extract concepts from any section of the document"}
+        
+        merged = self._merge_results(results, max_concepts)
+        if failed_sections:
+            merged["failed_sections"] = failed_sections
+            merged["total_sections"] = len(results) + failed_sections
+        return merged
+    
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Build the chat messages for an extraction prompt"""
+        return [
+            {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _complete(self, prompt: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+        """Run a single extraction request, streaming the response
+        
+        Progress is reported as tokens received out of the completion budget,
+        so the UI moves while the model is still writing.
+        """
+        stream = self.client.chat.completions.create(
+            model=EXTRACTION_MODEL,
+            messages=self._messages(prompt),
+            temperature=0.3,
+            max_tokens=MAX_COMPLETION_TOKENS,
+            response_format=JSON_RESPONSE_FORMAT,
+            stream=True
+        )
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                if progress_callback and len(parts) % STREAM_PROGRESS_EVERY == 0:
+                    progress_callback(min(len(parts), MAX_COMPLETION_TOKENS), MAX_COMPLETION_TOKENS)
+        return "".join(parts)
+    
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """The extractor's event loop, running in a daemon thread started on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="extraction-loop", daemon=True).start()
+            return self._loop
+    
+    def _run_on_loop(self, make_coroutine: Callable[[Callable[[int, int], None]], Any],
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> Any:
+        """Run a coroutine on the extractor's event loop and wait for its result
+        
+        make_coroutine receives a progress reporter; its updates are relayed to
+        progress_callback on the calling thread, since Streamlit elements can
+        only be updated from the script thread.
+        """
+        updates = queue.SimpleQueue()
+        future = asyncio.run_coroutine_threadsafe(
+            make_coroutine(lambda completed, total: updates.put((completed, total))),
+            self._event_loop()
+        )
+        while True:
+            done = future.done()
+            while not updates.empty():
+                update = updates.get()
+                if progress_callback:
+                    progress_callback(*update)
+            if done:
+                return future.result()
+            wait([future], timeout=0.1)
+    
+    async def _complete_chunks(self, chunks: List[str], chunk_tokens: int, max_concepts: int,
+                               progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[List[Any], int]:
+        """Run one extraction request per chunk, at most MAX_CONCURRENT_REQUESTS at a time
+        
+        Each chunk yields a list of response contents; a chunk that overflows
+        the model context is halved and retried, giving several contents.
+        Returns the per-chunk results and the smallest chunk size used.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+        client = self._async_client
+        limiter = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        total = len(chunks)
+        completed = 0
+        smallest = chunk_tokens
+        
+        async def complete_part(index: int, chunk: str) -> List[str]:
+            nonlocal smallest
+            prompt = create_extraction_prompt(chunk, max_concepts, part=index + 1, total_parts=total)
+            try:
+                async with limiter:
+                    response = await client.chat.completions.create(
+                        model=EXTRACTION_MODEL,
+                        messages=self._messages(prompt),
+                        temperature=0.3,
+                        max_tokens=MAX_COMPLETION_TOKENS,
+                        response_format=JSON_RESPONSE_FORMAT
+                    )
+            except openai.BadRequestError as e:
+                if not _is_context_length_error(e):
+                    raise
+                halves, half_tokens = self._shrink_chunk(chunk, e)
+                smallest = min(smallest, half_tokens)
+                contents = []
+                for half in halves:
+                    contents.extend(await complete_part(index, half))
+                return contents
+            return [response.choices[0].message.content]
+        
+        async def complete_chunk(index: int, chunk: str) -> List[str]:
+            nonlocal completed
+            try:
+                return await complete_part(index, chunk)
+            finally:
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total)
+        
+        results = await asyncio.gather(
+            *(complete_chunk(i, chunk) for i, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
+        return results, smallest
+    
+    def _shrink_chunk(self, chunk: str, error: Exception) -> Tuple[List[str], int]:
+        """Re-split a chunk that overflowed the model context into pieces half its size
+        
+        Returns the pieces and their token limit; re-raises error when the
+        chunk can't be split any further.
+        """
+        max_tokens = max(MIN_CHUNK_TOKENS, _count_tokens(chunk) // 2)
+        pieces = split_into_chunks(chunk, max_tokens)
+        if len(pieces) == 1:
+            raise error
+        return pieces, max_tokens
+    
+    def _parse_response(self, content: str) -> Dict[str, Any]:
+        """Parse and validate the JSON payload of an extraction response"""
+        try:
+            try:
+                result = _loads_json(content)
+            except json.JSONDecodeError:
+                # Responses without JSON mode may wrap the object in prose
+                json_match = re.search(r'\{.*\}', content, re.DOTALL)
+                if not json_match:
+                    return {"error": "Could not parse JSON response from OpenAI"}
+                result = _loads_json(json_match.group())
+            
+            if not isinstance(result, dict):
                 return {"error": "Could not parse JSON response from OpenAI"}
+            return self._validate_extraction_result(result)
                 
         except json.JSONDecodeError as e:
             return {"error": f"JSON parsing error: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error extracting concepts: {str(e)}"}
+    
+    def _merge_results(self, results: List[Dict[str, Any]], max_concepts: int) -> Dict[str, Any]:
+        """Merge per-chunk extraction results into a single result
+        
+        Concepts are deduplicated by name (case-insensitive) with their
+        importance scores summed, and relationships are unioned.
+        """
+        concepts_by_name = {}
+        relationships = {}
+        hierarchy = []
+        summaries = []
+        
+        for result in results:
+            # Map this chunk's concept IDs onto the merged concept IDs
+            id_map = {}
+            for concept in result['concepts']:
+                key = concept['name'].strip().lower()
+                merged = concepts_by_name.get(key)
+                if merged is None:
+                    merged = dict(concept, keywords=list(concept['keywords']))
+                    concepts_by_name[key] = merged
+                else:
+                    merged['importance'] += concept['importance']
+                    merged['keywords'].extend(k for k in concept['keywords'] if k not in merged['keywords'])
+                    if not merged['description']:
+                        merged['description'] = concept['description']
+                id_map[concept['id']] = merged['id']
+            
+            for rel in result['relationships']:
+                source, target = id_map[rel['source']], id_map[rel['target']]
+                if source == target:
+                    continue
+                rel_key = (source, target, rel['relationship_type'])
+                if rel_key not in relationships:
+                    relationships[rel_key] = dict(rel, source=source, target=target)
+            
+            hierarchy.extend(result.get('hierarchy', []))
+            if result.get('summary'):
+                summaries.append(result['summary'])
+        
+        concepts = sorted(concepts_by_name.values(), key=lambda c: c['importance'], reverse=True)[:max_concepts]
+        for concept in concepts:
+            concept['importance'] = min(10, concept['importance'])
+        concept_ids = {concept['id'] for concept in concepts}
+        
+        return {
+            "concepts": concepts,
+            "relationships": [
+                rel for rel in relationships.values()
+                if rel['source'] in concept_ids and rel['target'] in concept_ids
+            ],
+            "hierarchy": hierarchy,
+            "summary": "\n\n".join(summaries)
+        }
     
     def _validate_extraction_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and clean the extraction result"""
@@ -78,124 +694,214 @@ class ConceptExtractor:
         if 'hierarchy' not in result:
             result['hierarchy'] = []
         
-        # Validate concepts
-        valid_concepts = []
-        concept_ids = set()
-        
+        # Validate concepts, keeping the first concept for each cleaned ID
+        concepts_by_id = {}
         for concept in result['concepts']:
             if isinstance(concept, dict) and 'id' in concept and 'name' in concept:
-                concept.setdefault('description', '')
-                concept.setdefault('type', 'other')
-                concept.setdefault('importance', 5)
-                concept.setdefault('keywords', [])
-                
-                concept['id'] = self._clean_id(concept['id'])
-                if concept['id'] not in concept_ids:
-                    concept_ids.add(concept['id'])
-                    valid_concepts.append(concept)
-        
-        result['concepts'] = valid_concepts
-        
-        # Validate relationships
-        valid_relationships = []
-        for rel in result['relationships']:
-            if (isinstance(rel, dict) and 
-                'source' in rel and 'target' in rel and
-                rel['source'] in concept_ids and rel['target'] in concept_ids):
-                
-                rel.setdefault('relationship_type', 'related_to')
-                rel.setdefault('strength', 5)
-                rel.setdefault('description', '')
-                valid_relationships.append(rel)
+                concepts_by_id.setdefault(self._clean_id(concept['id']), concept)
+        
+        # Scores and keywords are coerced so merging and graph building can rely on their types
+        result['concepts'] = [
+            {'description': '', 'type': 'other', **concept, 'id': concept_id,
+             'name': str(concept['name']),
+             'importance': _as_score(concept.get('importance'), 5),
+             'keywords': concept['keywords'] if isinstance(concept.get('keywords'), list) else []}
+            for concept_id, concept in concepts_by_id.items()
+        ]
+        
+        # Validate relationships; their endpoints are cleaned like the concept IDs
+        concept_ids = frozenset(concepts_by_id)
+        result['relationships'] = [
+            {'relationship_type': 'related_to', 'description': '', **rel,
+             'source': source, 'target': target, 'strength': _as_score(rel.get('strength'), 5)}
+            for rel in result['relationships']
+            if isinstance(rel, dict) and 'source' in rel and 'target' in rel
+            for source, target in [(self._clean_id(rel['source']), self._clean_id(rel['target']))]
+            if source in concept_ids and target in concept_ids
+        ]
         
-        result['relationships'] = valid_relationships
         return result
     
     def _clean_id(self, concept_id: str) -> str:
         """Clean and normalize concept IDs"""
-        cleaned = re.sub(r'[^\w\s-]', '', str(concept_id).lower())
-        cleaned = re.sub(r'[\s-]+', '_', cleaned)
-        return cleaned.strip('_')
+        return _normalize_id(str(concept_id))
 
 
 class GraphBuilder:
-    """Build and manage the concept graph structure"""
+    """Build and manage the concept graph structure
+    
+    Nodes and edges are stored as parallel attribute lists (one list per
+    field) rather than a NetworkX graph, since the app only exports them
+    and computes a few statistics; as_networkx() builds a DiGraph for
+    callers that need graph algorithms.
+    """
     
     def __init__(self):
-        self.graph = nx.DiGraph()
+        self._clear()
         self.concept_groups = {}
     
-    def build_graph(self, concepts: List[Dict], relationships: List[Dict]) -> nx.DiGraph:
-        """Build NetworkX graph from concepts and relationships"""
-        self.graph.clear()
+    def _clear(self) -> None:
+        """Reset the node and edge storage"""
+        self._node_index = {}
+        self._node_ids = []
+        self._node_names = []
+        self._node_descriptions = []
+        self._node_types = []
+        self._node_importance = []
+        self._node_keywords = []
+        self._edge_index = {}
+        self._edge_sources = []
+        self._edge_targets = []
+        self._edge_types = []
+        self._edge_strengths = []
+        self._edge_descriptions = []
+        self._networkx = None
+    
+    def build_graph(self, concepts: List[Dict], relationships: List[Dict]) -> None:
+        """Build the graph from concepts and relationships
+        
+        As with a DiGraph, a repeated concept ID or (source, target) pair
+        keeps its first position and takes the later attributes.
+        """
+        self._clear()
         
         # Add nodes (concepts)
         for concept in concepts:
-            self.graph.add_node(
-                concept['id'],
-                name=concept['name'],
-                description=concept.get('description', ''),
-                type=concept.get('type', 'other'),
-                importance=concept.get('importance', 5),
-                keywords=concept.get('keywords', [])
-            )
+            index = self._node_index.get(concept['id'])
+            if index is None:
+                self._node_index[concept['id']] = len(self._node_ids)
+                self._node_ids.append(concept['id'])
+                self._node_names.append(concept['name'])
+                self._node_descriptions.append(concept.get('description', ''))
+                self._node_types.append(concept.get('type', 'other'))
+                self._node_importance.append(concept.get('importance', 5))
+                self._node_keywords.append(concept.get('keywords', []))
+            else:
+                self._node_names[index] = concept['name']
+                self._node_descriptions[index] = concept.get('description', '')
+                self._node_types[index] = concept.get('type', 'other')
+                self._node_importance[index] = concept.get('importance', 5)
+                self._node_keywords[index] = concept.get('keywords', [])
         
         # Add edges (relationships)
         for rel in relationships:
-            if (rel['source'] in self.graph.nodes and 
-                rel['target'] in self.graph.nodes):
-                self.graph.add_edge(
-                    rel['source'],
-                    rel['target'],
-                    relationship_type=rel.get('relationship_type', 'related_to'),
-                    strength=rel.get('strength', 5),
-                    description=rel.get('description', '')
+            if rel['source'] not in self._node_index or rel['target'] not in self._node_index:
+                continue
+            key = (rel['source'], rel['target'])
+            index = self._edge_index.get(key)
+            if index is None:
+                self._edge_index[key] = len(self._edge_sources)
+                self._edge_sources.append(rel['source'])
+                self._edge_targets.append(rel['target'])
+                self._edge_types.append(rel.get('relationship_type', 'related_to'))
+                self._edge_strengths.append(rel.get('strength', 5))
+                self._edge_descriptions.append(rel.get('description', ''))
+            else:
+                self._edge_types[index] = rel.get('relationship_type', 'related_to')
+                self._edge_strengths[index] = rel.get('strength', 5)
+                self._edge_descriptions[index] = rel.get('description', '')
+    
+    def as_networkx(self):
+        """Return the graph as a NetworkX DiGraph, built on first use"""
+        if self._networkx is None:
+            # NetworkX is only needed for graph algorithms, so keep it off the startup path
+            import networkx as nx
+            
+            graph = nx.DiGraph()
+            graph.add_nodes_from(
+                (node_id, {
+                    'name': name,
+                    'description': description,
+                    'type': node_type,
+                    'importance': importance,
+                    'keywords': keywords
+                })
+                for node_id, name, description, node_type, importance, keywords in zip(
+                    self._node_ids, self._node_names, self._node_descriptions,
+                    self._node_types, self._node_importance, self._node_keywords
                 )
-        
-        return self.graph
+            )
+            graph.add_edges_from(
+                (source, target, {
+                    'relationship_type': rel_type,
+                    'strength': strength,
+                    'description': description
+                })
+                for source, target, rel_type, strength, description in zip(
+                    self._edge_sources, self._edge_targets, self._edge_types,
+                    self._edge_strengths, self._edge_descriptions
+                )
+            )
+            self._networkx = graph
+        return self._networkx
     
     def get_graph_statistics(self) -> Dict[str, Any]:
         """Get statistics about the graph"""
-        if self.graph.number_of_nodes() == 0:
+        if not self._node_ids:
             return {"error": "No graph data available"}
         
         try:
+            num_nodes = len(self._node_ids)
+            num_edges = len(self._edge_sources)
+            
             return {
-                "nodes": self.graph.number_of_nodes(),
-                "edges": self.graph.number_of_edges(),
-                "density": nx.density(self.graph),
-                "is_connected": nx.is_weakly_connected(self.graph),
-                "strongly_connected_components": nx.number_strongly_connected_components(self.graph)
+                "nodes": num_nodes,
+                "edges": num_edges,
+                "density": num_edges / (num_nodes * (num_nodes - 1)) if num_nodes > 1 else 0.0,
+                "is_connected": self._is_weakly_connected()
             }
         except Exception as e:
             return {"error": f"Error calculating graph statistics: {str(e)}"}
     
+    def _is_weakly_connected(self) -> bool:
+        """Whether every node is reachable from the first one, ignoring edge direction"""
+        neighbors = {node_id: [] for node_id in self._node_ids}
+        for source, target in zip(self._edge_sources, self._edge_targets):
+            neighbors[source].append(target)
+            neighbors[target].append(source)
+        
+        visited = {self._node_ids[0]}
+        queue = deque(visited)
+        while queue:
+            for neighbor in neighbors[queue.popleft()]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        return len(visited) == len(self._node_ids)
+    
     def export_graph_data(self) -> Dict[str, Any]:
         """Export graph data for visualization"""
-        nodes = []
-        edges = []
-        
-        # Export nodes
-        for node_id, data in self.graph.nodes(data=True):
-            nodes.append({
+        color_for = TYPE_COLORS.get
+        nodes = [
+            {
                 "id": node_id,
-                "label": data.get('name', node_id),
-                "title": data.get('description', ''),
-                "type": data.get('type', 'other'),
-                "importance": data.get('importance', 5),
-                "size": max(15, data.get('importance', 5) * 4)
-            })
-        
-        # Export edges
-        for source, target, data in self.graph.edges(data=True):
-            edges.append({
+                "label": name,
+                "title": description,
+                "type": node_type,
+                "importance": importance,
+                "size": max(15, importance * 4),
+                "color": color_for(node_type, DEFAULT_TYPE_COLOR)
+            }
+            for node_id, name, description, node_type, importance in zip(
+                self._node_ids, self._node_names, self._node_descriptions,
+                self._node_types, self._node_importance
+            )
+        ]
+        
+        edges = [
+            {
                 "from": source,
                 "to": target,
-                "label": data.get('relationship_type', ''),
-                "title": data.get('description', ''),
-                "strength": data.get('strength', 5),
-                "width": max(1, data.get('strength', 5) / 2)
-            })
+                "label": rel_type,
+                "title": description,
+                "strength": strength,
+                "width": max(1, strength / 2)
+            }
+            for source, target, rel_type, strength, description in zip(
+                self._edge_sources, self._edge_targets, self._edge_types,
+                self._edge_strengths, self._edge_descriptions
+            )
+        ]
         
         return {
             "nodes": nodes,
@@ -3,36 +3,64 @@ File parsing utilities for Context Graph Explorer
 Supports PDF, DOCX, and Markdown file parsing
 """
 
+import codecs
+import io
+import multiprocessing
 import os
-import tempfile
-from typing import Dict, Any, Optional
-import streamlit as st
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Iterator, List, Optional
+from xml.etree import ElementTree
 
-# PDF parsing
+# PDF parsing: PyMuPDF extracts text much faster; pypdf is the fallback,
+# imported only when a PDF is parsed without PyMuPDF (see _get_pdf_reader)
 try:
-    from pypdf import PdfReader
+    import fitz
 except ImportError:
-    st.error("pypdf not installed. Please install it using: pip install pypdf")
+    fitz = None
 
-# DOCX parsing
-try:
-    from docx import Document
-except ImportError:
-    st.error("python-docx not installed. Please install it using: pip install python-docx")
+PdfReader = None
+
+# DOCX parsing: WordprocessingML element names and the text each one contributes
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCX_BODY = f'{_W}body'
+DOCX_PARAGRAPH = f'{_W}p'
+DOCX_TEXT = f'{_W}t'
+DOCX_SPECIAL_CHARS = {
+    f'{_W}tab': '\t',
+    f'{_W}ptab': '\t',
+    f'{_W}br': '\n',
+    f'{_W}cr': '\n',
+    f'{_W}noBreakHyphen': '-'
+}
+
+# Upload extensions (lowercase, without the dot) the parser understands
+SUPPORTED_EXTENSIONS = frozenset({'pdf', 'docx', 'txt', 'md'})
+
+# PDFs with more pages than this are extracted in parallel worker processes
+PARALLEL_PDF_PAGES = 20
 
 
 class DocumentParser:
     """Main document parser class supporting multiple file formats"""
     
     def __init__(self):
-        self.supported_formats = ['.pdf', '.docx', '.txt', '.md']
+        self.supported_formats = SUPPORTED_EXTENSIONS
+        self._parsers = {
+            'pdf': self._parse_pdf,
+            'docx': self._parse_docx,
+            'txt': self._parse_text,
+            'md': self._parse_text
+        }
     
-    def parse_document(self, uploaded_file) -> Dict[str, Any]:
+    def parse_document(self, uploaded_file, max_chars: Optional[int] = None) -> Dict[str, Any]:
         """
         Parse uploaded document and extract text content
         
         Args:
             uploaded_file: Streamlit uploaded file object
+            max_chars: Stop extracting once this much text is collected
             
         Returns:
             Dict containing parsed content and metadata
@@ -40,110 +68,247 @@ class DocumentParser:
         if uploaded_file is None:
             return {"error": "No file uploaded"}
         
-        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+        return self.parse_bytes(uploaded_file.name, uploaded_file.getvalue(), max_chars)
+    
+    def parse_bytes(self, filename: str, data: bytes, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Parse raw document bytes and extract text content
+        
+        Args:
+            filename: Original filename, used to pick the parser
+            data: File content
+            max_chars: Stop extracting once this much text is collected,
+                e.g. when only a preview is needed. The text may run a page
+                or paragraph past the limit, and paragraph/line counts then
+                cover only the extracted part (PDF page counts stay exact).
+            
+        Returns:
+            Dict containing parsed content and metadata
+        """
+        file_extension = _file_extension(filename)
+        parser = self._parsers.get(file_extension)
         
-        if file_extension not in self.supported_formats:
-            return {"error": f"Unsupported file format: {file_extension}"}
+        if parser is None:
+            return {"error": f"Unsupported file format: .{file_extension}"}
         
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            # Parse based on file type
-            if file_extension == '.pdf':
-                result = self._parse_pdf(tmp_file_path, uploaded_file.name)
-            elif file_extension == '.docx':
-                result = self._parse_docx(tmp_file_path, uploaded_file.name)
-            elif file_extension in ['.txt', '.md']:
-                result = self._parse_text(tmp_file_path, uploaded_file.name)
-            else:
-                result = {"error": f"Parser not implemented for {file_extension}"}
-            
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
-            
-            return result
+            # Parse based on file type, straight from the in-memory bytes
+            return parser(data, filename, max_chars)
             
         except Exception as e:
             return {"error": f"Error parsing document: {str(e)}"}
     
-    def _parse_pdf(self, file_path: str, filename: str) -> Dict[str, Any]:
-        """Parse PDF document"""
+    def _parse_pdf(self, data: bytes, filename: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Parse PDF document
+        
+        Long PDFs are split into page ranges that are extracted in parallel
+        worker processes; with max_chars, pages are extracted one at a time
+        until enough text is collected.
+        """
         try:
-            reader = PdfReader(file_path)
-            text_content = ""
-            
-            for page_num, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                text_content += f"\n--- Page {page_num + 1} ---\n"
-                text_content += page_text
+            # One open document serves the page count and, unless the pages go
+            # to worker processes, the text extraction
+            with _open_pdf(data) as doc:
+                num_pages = _pdf_page_count(doc)
+                workers = min(os.cpu_count() or 1, num_pages // PARALLEL_PDF_PAGES + 1)
+                
+                page_texts = None
+                if max_chars is None and num_pages > PARALLEL_PDF_PAGES and workers > 1:
+                    page_texts = _extract_pdf_pages_parallel(data, num_pages, workers)
+                if page_texts is None:
+                    # Lazy, so a max_chars preview stops extracting at the limit
+                    page_texts = (_pdf_page_text(doc, page_num) for page_num in range(num_pages))
+                
+                parts = []
+                length = 0
+                for page_num, page_text in enumerate(page_texts):
+                    parts.append(f"\n--- Page {page_num + 1} ---\n")
+                    parts.append(page_text)
+                    length += len(page_text)
+                    if max_chars is not None and length >= max_chars:
+                        break
             
             return {
                 "filename": filename,
                 "file_type": "PDF",
-                "num_pages": len(reader.pages),
-                "text_content": text_content.strip(),
+                "num_pages": num_pages,
+                "text_content": "".join(parts).strip(),
                 "metadata": {
-                    "pages": len(reader.pages),
-                    "file_size": os.path.getsize(file_path)
+                    "pages": num_pages,
+                    "file_size": len(data)
                 }
             }
         except Exception as e:
             return {"error": f"Error parsing PDF: {str(e)}"}
     
-    def _parse_docx(self, file_path: str, filename: str) -> Dict[str, Any]:
-        """Parse DOCX document"""
+    def _parse_docx(self, data: bytes, filename: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Parse DOCX document
+        
+        Streams the body paragraphs straight from word/document.xml instead of
+        building python-docx's paragraph, run and style objects; with
+        max_chars, the rest of the XML isn't parsed at all.
+        """
         try:
-            doc = Document(file_path)
-            text_content = ""
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content += paragraph.text + "\n"
+            paragraphs = []
+            length = 0
+            with zipfile.ZipFile(io.BytesIO(data)) as archive, archive.open('word/document.xml') as xml_file:
+                for text in _iter_docx_paragraphs(xml_file):
+                    paragraphs.append(text)
+                    length += len(text)
+                    if max_chars is not None and length >= max_chars:
+                        break
+            text_content = "\n".join(text for text in paragraphs if text.strip())
             
             return {
                 "filename": filename,
                 "file_type": "DOCX",
-                "num_paragraphs": len(doc.paragraphs),
+                "num_paragraphs": len(paragraphs),
                 "text_content": text_content.strip(),
                 "metadata": {
-                    "paragraphs": len(doc.paragraphs),
-                    "file_size": os.path.getsize(file_path)
+                    "paragraphs": len(paragraphs),
+                    "file_size": len(data)
                 }
             }
         except Exception as e:
             return {"error": f"Error parsing DOCX: {str(e)}"}
     
-    def _parse_text(self, file_path: str, filename: str) -> Dict[str, Any]:
+    def _parse_text(self, data: bytes, filename: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
         """Parse text/markdown document"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text_content = file.read()
+            if max_chars is None:
+                text_content = data.decode('utf-8')
+            else:
+                # A UTF-8 character is at most 4 bytes; the incremental decoder
+                # holds back a character cut off at the end of the slice
+                text_content = codecs.getincrementaldecoder('utf-8')().decode(data[:max_chars * 4])[:max_chars]
             
-            lines = text_content.split('\n')
+            # Normalize line endings the way a text-mode file read did
+            text_content = text_content.replace('\r\n', '\n').replace('\r', '\n')
+            
+            # Count lines without materializing a list of them
+            num_lines = text_content.count('\n') + 1
             
             return {
                 "filename": filename,
                 "file_type": "TEXT/MARKDOWN",
-                "num_lines": len(lines),
+                "num_lines": num_lines,
                 "text_content": text_content.strip(),
                 "metadata": {
-                    "lines": len(lines),
-                    "file_size": os.path.getsize(file_path)
+                    "lines": num_lines,
+                    "file_size": len(data)
                 }
             }
         except Exception as e:
             return {"error": f"Error parsing text file: {str(e)}"}
     
-    def get_text_preview(self, text_content: str, max_chars: int = 500) -> str:
+    @staticmethod
+    def get_text_preview(text_content: str, max_chars: int = 500) -> str:
         """Get a preview of the text content"""
         if len(text_content) <= max_chars:
             return text_content
         return text_content[:max_chars] + "..."
 
 
+def _iter_docx_paragraphs(xml_file) -> Iterator[str]:
+    """Text of each top-level body paragraph of a DOCX document.xml, parsed incrementally
+    
+    Each body child is cleared once it has been read, so memory stays flat
+    however long the document is.
+    """
+    parents = []
+    for event, element in ElementTree.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        parent = parents[-1] if parents else None
+        if parent is None or parent.tag != DOCX_BODY:
+            continue
+        if element.tag == DOCX_PARAGRAPH:
+            yield _docx_paragraph_text(element)
+        # Drop the finished paragraph or table from the body
+        parent.remove(element)
+
+
+def _docx_paragraph_text(paragraph: ElementTree.Element) -> str:
+    """Text of a DOCX paragraph element, with tabs and line breaks"""
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == DOCX_TEXT:
+            parts.append(element.text or '')
+        elif element.tag in DOCX_SPECIAL_CHARS:
+            parts.append(DOCX_SPECIAL_CHARS[element.tag])
+    return "".join(parts)
+
+
+def _get_pdf_reader():
+    """pypdf's PdfReader, imported on first use"""
+    global PdfReader
+    if PdfReader is None:
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ImportError("pypdf not installed. Please install it using: pip install pypdf") from None
+    return PdfReader
+
+
+def _open_pdf(data: bytes):
+    """Open a PDF with PyMuPDF, or with pypdf when PyMuPDF isn't installed
+    
+    Both document types close when used as a context manager.
+    """
+    if fitz is not None:
+        return fitz.open(stream=data, filetype="pdf")
+    return _get_pdf_reader()(io.BytesIO(data))
+
+
+def _pdf_page_count(doc) -> int:
+    """Number of pages in a document from _open_pdf"""
+    return doc.page_count if fitz is not None else len(doc.pages)
+
+
+def _pdf_page_text(doc, page_num: int) -> str:
+    """Text of one page of a document from _open_pdf"""
+    if fitz is not None:
+        return doc[page_num].get_text("text")
+    return doc.pages[page_num].extract_text()
+
+
+def _extract_pdf_pages(data: bytes, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF
+    
+    Module-level so worker processes can run it.
+    """
+    with _open_pdf(data) as doc:
+        return [_pdf_page_text(doc, page_num) for page_num in range(start, stop)]
+
+
+def _extract_pdf_pages_parallel(data: bytes, num_pages: int, workers: int) -> Optional[List[str]]:
+    """Extract PDF page text in worker processes, one contiguous page range each
+    
+    Returns None if the process pool can't be used, so the caller can fall
+    back to extracting in this process.
+    """
+    # One page range per worker, so each worker receives the PDF bytes once
+    step = -(-num_pages // workers)
+    starts = list(range(0, num_pages, step))
+    stops = [min(start + step, num_pages) for start in starts]
+    try:
+        # Spawned rather than forked: forking the multithreaded Streamlit
+        # server can deadlock the children
+        with ProcessPoolExecutor(max_workers=len(starts), mp_context=multiprocessing.get_context("spawn")) as pool:
+            ranges = pool.map(_extract_pdf_pages, [data] * len(starts), starts, stops)
+            return [page_text for page_texts in ranges for page_text in page_texts]
+    except (OSError, BrokenProcessPool):
+        return None
+
+
+def _file_extension(filename: str) -> str:
+    """Lowercase extension of filename without the dot, or '' if it has none"""
+    _, dot, extension = filename.rpartition('.')
+    return extension.lower() if dot else ''
+
+
 def validate_file_upload(uploaded_file) -> Optional[str]:
     """Validate uploaded file and return error message if invalid"""
     if uploaded_file is None:
@@ -153,10 +318,8 @@ def validate_file_upload(uploaded_file) -> Optional[str]:
     if uploaded_file.size > max_size:
         return f"File size too large. Maximum allowed size is {max_size // (1024*1024)}MB"
     
-    allowed_extensions = ['.pdf', '.docx', '.txt', '.md']
-    file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-    
-    if file_extension not in allowed_extensions:
-        return f"Unsupported file type. Allowed types: {', '.join(allowed_extensions)}"
+    if _file_extension(uploaded_file.name) not in SUPPORTED_EXTENSIONS:
+        allowed = ', '.join(f'.{ext}' for ext in sorted(SUPPORTED_EXTENSIONS))
+        return f"Unsupported file type. Allowed types: {allowed}"
     
     return None
\ No newline at end of file
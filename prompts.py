@@ -2,6 +2,14 @@
 Prompt templates for OpenAI GPT-4o concept extraction
 """
 
+import json
+from typing import Any, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 CONCEPT_EXTRACTION_PROMPT = """
 You are an expert at analyzing documents and extracting key concepts, relationships, and hierarchical structures.
 
@@ -144,32 +152,56 @@ Return recommendations in JSON format:
 }}
 """
 
-def create_extraction_prompt(document_text: str, max_concepts: int = 25) -> str:
+def _dump_json(data: Any) -> str:
+    """Indented JSON for embedding in a prompt, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data, indent=2)
+
+
+def _split_template(template: str, field: str) -> Tuple[str, str]:
+    """Split a single-field format template into the literal text around the field"""
+    before, after = template.split("{" + field + "}")
+    return tuple(part.replace("{{", "{").replace("}}", "}") for part in (before, after))
+
+
+# Templates pre-split at import, so building a prompt is two concatenations
+# instead of a format pass over the whole template
+_EXTRACTION_PARTS = _split_template(CONCEPT_EXTRACTION_PROMPT, "document_text")
+_REFINEMENT_PARTS = _split_template(RELATIONSHIP_REFINEMENT_PROMPT, "current_data")
+_GROUPING_PARTS = _split_template(CONCEPT_GROUPING_PROMPT, "concepts")
+_VALIDATION_PARTS = _split_template(GRAPH_VALIDATION_PROMPT, "graph_data")
+
+def create_extraction_prompt(document_text: str, max_concepts: int = 25,
+                             part: Optional[int] = None, total_parts: Optional[int] = None) -> str:
     """Create a customized concept extraction prompt"""
-    prompt = CONCEPT_EXTRACTION_PROMPT.format(document_text=document_text)
+    prompt = _EXTRACTION_PARTS[0] + document_text + _EXTRACTION_PARTS[1]
     
     if max_concepts != 25:
         prompt += f"\n\nNote: Focus on the top {max_concepts} most important concepts."
     
+    if total_parts and total_parts > 1:
+        prompt += (f"\n\nNote: This text is section [{part}] of {total_parts} of a longer document. "
+                   "Use concept names consistently so results from all sections can be merged.")
+    
     return prompt
 
+def create_extraction_prompts(chunks: List[str], max_concepts: int = 25) -> List[str]:
+    """Create one extraction prompt per section of a chunked document"""
+    total = len(chunks)
+    return [
+        create_extraction_prompt(chunk, max_concepts, part=i + 1, total_parts=total)
+        for i, chunk in enumerate(chunks)
+    ]
+
 def create_refinement_prompt(current_data: dict) -> str:
     """Create a relationship refinement prompt"""
-    import json
-    return RELATIONSHIP_REFINEMENT_PROMPT.format(
-        current_data=json.dumps(current_data, indent=2)
-    )
+    return _REFINEMENT_PARTS[0] + _dump_json(current_data) + _REFINEMENT_PARTS[1]
 
 def create_grouping_prompt(concepts: list) -> str:
     """Create a concept grouping prompt"""
-    import json
-    return CONCEPT_GROUPING_PROMPT.format(
-        concepts=json.dumps(concepts, indent=2)
-    )
+    return _GROUPING_PARTS[0] + _dump_json(concepts) + _GROUPING_PARTS[1]
 
 def create_validation_prompt(graph_data: dict) -> str:
     """Create a graph validation prompt"""
-    import json
-    return GRAPH_VALIDATION_PROMPT.format(
-        graph_data=json.dumps(graph_data, indent=2)
-    )
\ No newline at end of file
+    return _VALIDATION_PARTS[0] + _dump_json(graph_data) + _VALIDATION_PARTS[1]
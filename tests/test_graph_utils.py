@@ -0,0 +1,77 @@
+"""
+Tests for the extraction result validation and merging in graph_utils
+Run with: python -m unittest discover tests
+"""
+
+import json
+import unittest
+
+from graph_utils import ConceptExtractor
+
+
+class MergeContentsTest(unittest.TestCase):
+    """Merging per-chunk responses whose fields have unexpected types"""
+
+    def setUp(self):
+        self.extractor = ConceptExtractor()
+
+    def test_shared_concept_with_string_and_null_fields(self):
+        first = {
+            "concepts": [
+                {"id": "neural_network", "name": "Neural Network", "importance": "8", "keywords": None},
+                {"id": "training", "name": "Training", "importance": 6, "keywords": ["data"]}
+            ],
+            "relationships": [
+                {"source": "training", "target": "neural_network", "strength": "7"}
+            ],
+            "summary": "first"
+        }
+        second = {
+            "concepts": [
+                {"id": "neural_network", "name": "Neural Network", "importance": 1.5,
+                 "keywords": ["layers"]},
+                {"id": "training", "name": "Training", "importance": "high", "keywords": "data"}
+            ],
+            "relationships": [
+                {"source": "neural_network", "target": "training", "strength": None}
+            ],
+            "summary": "second"
+        }
+
+        result = self.extractor._merge_contents([json.dumps(first), json.dumps(second)], 25)
+
+        self.assertNotIn("error", result)
+        concepts = {concept["id"]: concept for concept in result["concepts"]}
+        self.assertEqual(concepts["neural_network"]["importance"], 9.5)
+        self.assertEqual(concepts["neural_network"]["keywords"], ["layers"])
+        # "high" isn't a number, so the second chunk contributes the default of 5
+        self.assertEqual(concepts["training"]["importance"], 10)
+        self.assertEqual(concepts["training"]["keywords"], ["data"])
+        strengths = {(rel["source"], rel["target"]): rel["strength"] for rel in result["relationships"]}
+        self.assertEqual(strengths, {("training", "neural_network"): 7, ("neural_network", "training"): 5})
+
+
+class ValidateExtractionResultTest(unittest.TestCase):
+    """Relationship endpoints are normalized the same way as concept IDs"""
+
+    def test_relationship_endpoints_match_cleaned_concept_ids(self):
+        result = ConceptExtractor()._validate_extraction_result({
+            "concepts": [
+                {"id": "Neural Network", "name": "Neural Network"},
+                {"id": "training-data", "name": "Training Data"}
+            ],
+            "relationships": [
+                {"source": "Training Data", "target": "neural-network"},
+                {"source": "training_data", "target": "Unknown Concept"}
+            ]
+        })
+
+        self.assertEqual([concept["id"] for concept in result["concepts"]], ["neural_network", "training_data"])
+        self.assertEqual(
+            [(rel["source"], rel["target"]) for rel in result["relationships"]],
+            [("training_data", "neural_network")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()